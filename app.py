@@ -1,4 +1,4 @@
-from flask import Flask, request, jsonify, send_from_directory
+from flask import Flask, request, jsonify, send_from_directory, g, has_request_context
 from flask_cors import CORS
 import mimetypes
 import yfinance as yf
@@ -6,9 +6,39 @@ import pandas as pd
 import numpy as np
 from datetime import datetime, timedelta
 import logging
-import requests
 import json
+import os
+import functools
+import hashlib
+import contextlib
+import cProfile
+import io
+import pstats
+import threading
+import re
+import time
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import parse_qsl, urlsplit
 from pandas import json_normalize
+from price_store import PriceStore, split_tickers
+from news_store import NewsStore
+from news_sync import NewsSync
+from response_cache import ResponseCache, session_ttl
+from single_flight import SingleFlight
+from hedging import run_hedged
+from downsample import downsample_bars, DOWNSAMPLE_METHODS
+from static_assets import StaticAssets, MIMETYPES
+from http_client import PooledHttpClient
+from circuit_breaker import CircuitBreaker, CircuitOpenError, CLOSED
+from prefetch import PrefetchScheduler
+from symbol_index import SymbolIndex, load_listings
+from cassette_store import CassetteStore
+from metrics import MetricsRegistry, SIZE_BUCKETS, CONTENT_TYPE as METRICS_CONTENT_TYPE
+from synthetic import synthetic_bars, SYNTHETIC_INTERVALS
+from serialization import (
+    dumps, price_column, price_columns, columns_to_records, historic_price_records, news_records, join_news_to_bars,
+    delta_encode, to_msgpack, to_arrow, missing_format_dependency, PRICE_FORMATS, MSGPACK_MIMETYPE, ARROW_MIMETYPE
+)
 
 app = Flask(__name__)
 CORS(app)
@@ -17,6 +47,412 @@ CORS(app)
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+# Local OHLCV store so warm symbols only download the bars they are missing
+price_store = PriceStore()
+
+# Local TickerTick story store so warm symbols only fetch stories they have not seen
+news_store = NewsStore()
+
+# In-process cache of serialized API responses, expiring with the trading session
+response_cache = ResponseCache()
+
+# Coalesces identical upstream fetches running concurrently on gunicorn threads
+upstream_flight = SingleFlight()
+
+# Hedged Yahoo Finance fallback chain: seconds before the next method is
+# started alongside a slow one, and the overall budget per request
+YF_HEDGE_DELAY = float(os.environ.get('YF_HEDGE_DELAY', 3))
+YF_DEADLINE = float(os.environ.get('YF_DEADLINE', 20))
+yf_executor = ThreadPoolExecutor(max_workers=int(os.environ.get('YF_MAX_WORKERS', 16)), thread_name_prefix='yfinance')
+
+def yahoo_data_missing(data, tickers=None, *args, **kwargs):
+    """
+    True if Yahoo answered with an empty frame for a symbol known to exist.
+    yfinance swallows network and rate-limit errors and returns an empty
+    frame, but it also returns one for an unknown ticker, which is a valid
+    answer so bad symbols cannot open the circuit for everyone.
+    """
+    if data is not None and not data.empty:
+        return False
+    symbols = [symbol for symbol in ticker_key(tickers or '').split(',') if symbol]
+    return any(symbol in symbol_index or price_store.last_date(symbol) is not None for symbol in symbols)
+
+# Circuit breakers so an upstream outage fails fast instead of holding threads.
+# Errors, timeouts and slow calls count as failures, and also empty Yahoo
+# frames for known symbols and non-2xx TickerTick responses.
+yahoo_breaker = CircuitBreaker('yahoo_finance', is_failure=yahoo_data_missing)
+tickertick_breaker = CircuitBreaker('tickertick', is_failure=lambda response, *args, **kwargs: response.status_code >= 400)
+
+# Keep-alive connection pool for TickerTick news pagination
+tickertick_http = PooledHttpClient(timeouts={'api.tickertick.com': (5, 30)})
+
+# Record/replay of raw Yahoo Finance and TickerTick responses, off unless UPSTREAM_CASSETTE_MODE is set
+cassettes = CassetteStore()
+
+# ?profile=1 returns a cProfile summary of the request instead of its response, when enabled
+PROFILE_ENABLED = os.environ.get('PROFILE_ENABLED', '0') == '1'
+PROFILE_TOP = int(os.environ.get('PROFILE_TOP', 40))
+PROFILE_SORTS = ('cumulative', 'tottime', 'calls')
+# Only one profiler can be active at a time
+profile_lock = threading.Lock()
+
+# Prometheus metrics of this process, served at /metrics
+metrics = MetricsRegistry()
+request_latency = metrics.histogram(
+    'http_request_duration_seconds', 'Time to build a response, by route, method and status', ('route', 'method', 'status')
+)
+requests_in_flight = metrics.gauge('http_requests_in_flight', 'Requests being handled, by route', ('route',))
+response_size = metrics.histogram(
+    'http_response_size_bytes', 'Size of response bodies, by route (streamed responses are not counted)', ('route',),
+    SIZE_BUCKETS
+)
+mock_fallbacks = metrics.counter('mock_fallbacks_total', 'Responses built from mock data, by route', ('route',))
+upstream_latency = metrics.histogram(
+    'upstream_request_duration_seconds',
+    'Upstream call time by upstream, fallback method or page, and outcome (ok, empty or error)',
+    ('upstream', 'method', 'outcome')
+)
+cache_lookups = metrics.counter('response_cache_lookups_total', 'Response cache lookups by endpoint and result', ('endpoint', 'result'))
+metrics.callback(
+    'response_cache_hit_ratio', 'Share of response cache lookups answered from the cache', (),
+    lambda: {(): response_cache.stats()['hit_ratio']}
+)
+metrics.callback(
+    'response_cache_bytes', 'Bytes held by the response cache', (), lambda: {(): response_cache.stats()['bytes']}
+)
+metrics.callback(
+    'response_cache_evictions_total', 'Responses evicted from the cache to stay within its byte budget', (),
+    lambda: {(): response_cache.stats()['evictions']}, kind='counter'
+)
+metrics.callback(
+    'upstream_circuit_open', '1 while the upstream circuit breaker is open or half-open', ('upstream',),
+    lambda: {(breaker.name,): int(breaker.state != CLOSED) for breaker in (yahoo_breaker, tickertick_breaker)}
+)
+
+# Frontend files indexed once at startup with precompressed variants
+static_assets = StaticAssets(app.root_path)
+
+# Calendar days covered by each period we can serve from the price store
+PERIOD_DAYS = {
+    '1mo': 30,
+    '3mo': 90,
+    '6mo': 180,
+    '1y': 365,
+    '2y': 730,
+    '5y': 1825,
+    '10y': 3650,
+}
+
+# TickerTick feed of SeekingAlpha and TickerReport stories for one ticker
+TICKERTICK_FEED_URL = "https://api.tickertick.com/feed?q=(and tt:{symbol} (or s:tickerreport s:seekingalpha))&lang=en&n=200"
+
+# How far back news pagination walks
+NEWS_HORIZON_DAYS = 90
+
+# TickerTick pages walked per /api/stock-news and /api/stock-news-tt request
+NEWS_MAX_PAGES = 10
+NEWS_TT_MAX_PAGES = 2
+
+# Encodings offered by the streaming news endpoints
+STREAM_FORMATS = ('ndjson', 'sse')
+
+# Seed of the synthetic bars served when yfinance fails; the same seed gives the same bars per symbol
+MOCK_SEED = int(os.environ.get('MOCK_SEED', 0))
+
+# Price formats offered by /api/chart-bundle
+BUNDLE_FORMATS = ('json', 'columnar')
+
+# Runs the news half of /api/chart-bundle alongside the price fetch
+bundle_executor = ThreadPoolExecutor(max_workers=int(os.environ.get('BUNDLE_MAX_WORKERS', 8)), thread_name_prefix='bundle-news')
+
+# Symbols users open most, also the default prefetch watchlist
+POPULAR_STOCKS = [
+    {'symbol': 'AAPL', 'name': 'Apple Inc.'},
+    {'symbol': 'GOOGL', 'name': 'Alphabet Inc.'},
+    {'symbol': 'MSFT', 'name': 'Microsoft Corporation'},
+    {'symbol': 'AMZN', 'name': 'Amazon.com Inc.'},
+    {'symbol': 'TSLA', 'name': 'Tesla Inc.'},
+    {'symbol': 'META', 'name': 'Meta Platforms Inc.'},
+    {'symbol': 'NVDA', 'name': 'NVIDIA Corporation'},
+    {'symbol': 'NFLX', 'name': 'Netflix Inc.'},
+    {'symbol': 'DIS', 'name': 'The Walt Disney Company'},
+    {'symbol': 'JPM', 'name': 'JPMorgan Chase & Co.'}
+]
+
+# Upper bound on /api/search-stocks results
+SEARCH_MAX_RESULTS = 50
+
+def build_symbol_index():
+    """Index the symbol listing files, or the popular stocks when none is installed"""
+    records, sources = load_listings()
+    if records:
+        return SymbolIndex(records, source=', '.join(sources))
+    logger.warning("No symbol listing file found (run python symbol_index.py to fetch them), searching the popular stocks only")
+    return SymbolIndex([(stock['symbol'], stock['name']) for stock in POPULAR_STOCKS], source='popular_stocks')
+
+# Symbol universe behind /api/search-stocks, indexed once at startup
+symbol_index = build_symbol_index()
+
+# Upper bound on symbols per /api/stock-data/batch request
+BATCH_MAX_SYMBOLS = 100
+
+def cached_response(endpoint, params=None):
+    """
+    Serve a view from the response cache, keyed on (endpoint, symbol, *params),
+    where params maps each keyed query parameter to its default.
+    Only successful responses built from real upstream data are stored.
+    Successful responses carry a strong ETag derived from the body and are
+    answered with 304 Not Modified when it matches If-None-Match.
+    """
+    def cache_key(args):
+        return (endpoint, args.get('symbol', 'AAPL').upper()) + tuple(args.get(name, default) for name, default in (params or {}).items())
+    
+    def decorator(view):
+        @functools.wraps(view)
+        def wrapper(*args, **kwargs):
+            key = cache_key(request.args)
+            # The prefetch scheduler and profiled requests always run the view
+            bypass = g.get('refresh_cache', False) or 'profiler' in g
+            cached = None if bypass else response_cache.get(key)
+            if not bypass:
+                cache_lookups.inc(endpoint, 'miss' if cached is None else 'hit')
+            if cached is not None:
+                mimetype, body, etag = cached
+                response = app.response_class(body, mimetype=mimetype)
+                response.headers['X-Cache'] = 'HIT'
+            else:
+                response = app.make_response(view(*args, **kwargs))
+                response.headers['X-Cache'] = 'MISS'
+                if response.status_code != 200:
+                    return response
+                body = response.get_data()
+                etag = body_etag(body)
+                if not g.get('served_mock', False):
+                    response_cache.set(key, (response.mimetype, body, etag), ttl=g.get('cache_ttl'), size=len(body))
+            # Let browsers keep the body but revalidate it on every request
+            response.headers['Cache-Control'] = 'no-cache'
+            response.set_etag(etag)
+            return response.make_conditional(request)
+        wrapper.cache_key = cache_key
+        return wrapper
+    return decorator
+
+def body_etag(body):
+    """Strong ETag for a response body"""
+    return hashlib.blake2b(body, digest_size=16).hexdigest()
+
+def parse_since_date(since):
+    """Parse a since= date (YYYY-MM-DD); raises ValueError when it is malformed"""
+    try:
+        return datetime.strptime(since, '%Y-%m-%d')
+    except ValueError:
+        raise ValueError('since must be a date in YYYY-MM-DD format')
+
+def filter_news_since(df, since, allow_id=True):
+    """
+    Keep only stories after since, which is either a date (YYYY-MM-DD) or,
+    when allow_id is set, a TickerTick story id. For an id, the stories listed
+    before it in newest-first order are kept; an unknown id keeps everything
+    so the client resynchronizes.
+    """
+    if since is None:
+        return df
+    try:
+        since_date = parse_since_date(since).date()
+    except ValueError:
+        if not allow_id:
+            raise
+        if 'id' not in df.columns:
+            return df
+        matches = (df['id'].astype(str) == since).to_numpy().nonzero()[0]
+        return df.iloc[:matches[0]] if len(matches) else df
+    return df[pd.to_datetime(df['pubdate']).dt.date > since_date]
+
+def json_response(payload, status=200):
+    """Build a JSON response with the fast encoder from serialization.py"""
+    return app.response_class(dumps(payload), status=status, mimetype='application/json')
+
+def price_data_response(payload, columns):
+    """
+    Attach price bars (a dict of parallel lists) to payload and encode it in
+    the format requested by the 'format' query parameter:
+    - json (default): 'data' is a list of per-day objects
+    - columnar: 'data' is an object of parallel arrays
+    - msgpack: the columnar payload encoded with msgpack
+    - arrow: the bars as an Arrow IPC stream, the rest of payload in its schema metadata
+    delta=1 delta-encodes dates and prices for the columnar and msgpack formats.
+    """
+    fmt = request.args.get('format', 'json')
+    if fmt == 'json':
+        payload['data'] = columns_to_records(columns)
+        return json_response(payload)
+    if fmt == 'arrow':
+        return app.response_class(to_arrow(columns, payload), mimetype=ARROW_MIMETYPE)
+    if request.args.get('delta') == '1' and columns['date']:
+        columns = delta_encode(columns)
+        payload['encoding'] = 'delta'
+    payload['data'] = columns
+    if fmt == 'msgpack':
+        return app.response_class(to_msgpack(payload), mimetype=MSGPACK_MIMETYPE)
+    return json_response(payload)
+
+def format_problem(fmt):
+    """Explain why a price format cannot be served, or return None if it can"""
+    if fmt not in PRICE_FORMATS:
+        return f"Unsupported format '{fmt}', expected one of {', '.join(PRICE_FORMATS)}"
+    package = missing_format_dependency(fmt)
+    if package:
+        return f"Format '{fmt}' requires the {package} package, which is not installed"
+    return None
+
+def format_error():
+    """Return a 400 response if the requested price format is unknown or unavailable, else None"""
+    problem = format_problem(request.args.get('format', 'json'))
+    if problem:
+        return jsonify({'error': problem}), 400
+    return None
+
+def downsample_args(args=None):
+    """
+    Parse the max_points and downsample query parameters (of the current
+    request unless args is given).
+    Returns (max_points or None, method); raises ValueError when they are invalid.
+    """
+    if args is None:
+        args = request.args
+    method = args.get('downsample', 'lttb')
+    if method not in DOWNSAMPLE_METHODS:
+        raise ValueError(f"Unsupported downsample method '{method}', expected one of {', '.join(DOWNSAMPLE_METHODS)}")
+    max_points = args.get('max_points')
+    if max_points is None:
+        return None, method
+    try:
+        max_points = int(max_points)
+    except ValueError:
+        raise ValueError('max_points must be an integer')
+    if max_points < 3:
+        raise ValueError('max_points must be at least 3')
+    return max_points, method
+
+def news_stream_response(symbol, max_pages, shape):
+    """
+    Stream news for symbol while TickerTick is paged instead of after the
+    whole walk: a 'news' event per fetched page with its stories as records
+    (shape turns a frame of synced stories into the endpoint's records), one
+    with the stored stories the walk did not reach, then a 'done' event with
+    the total. format=ndjson (default) writes one JSON object per line with
+    an 'event' field, format=sse writes Server-Sent Events.
+    """
+    fmt = request.args.get('format', 'ndjson')
+    if fmt not in STREAM_FORMATS:
+        return jsonify({'error': f"Unsupported format '{fmt}', expected ndjson or sse"}), 400
+    
+    def encode(event, payload):
+        if fmt == 'sse':
+            return b'event: ' + event.encode() + b'\ndata: ' + dumps(payload) + b'\n\n'
+        return dumps(dict(payload, event=event)) + b'\n'
+    
+    def events():
+        cutoff_ms = (datetime.now() - timedelta(days=NEWS_HORIZON_DAYS)).timestamp() * 1000
+        sent = set()
+        
+        def unsent_records(stories):
+            stories = [story for story in stories if story['time'] >= cutoff_ms and str(story['id']) not in sent]
+            sent.update(str(story['id']) for story in stories)
+            return shape(collect_stories([stories])) if stories else []
+        
+        count = 0
+        try:
+            for stories in iter_news_sync(symbol, max_pages):
+                records = unsent_records(stories)
+                if records:
+                    count += len(records)
+                    yield encode('news', {'symbol': symbol, 'news': records})
+            records = unsent_records(news_store.load(symbol, since_ms=cutoff_ms))
+            if records:
+                count += len(records)
+                yield encode('news', {'symbol': symbol, 'news': records})
+            yield encode('done', {'symbol': symbol, 'count': count})
+        except Exception as e:
+            logger.error(f"Error streaming news for {symbol}: {str(e)}")
+            yield encode('error', {'symbol': symbol, 'error': f'Failed to fetch news: {str(e)}'})
+    
+    logger.info(f"Streaming news for {symbol} as {fmt}")
+    return app.response_class(
+        events(),
+        mimetype='text/event-stream' if fmt == 'sse' else 'application/x-ndjson',
+        headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'}
+    )
+
+def shared_fetch(key, fn, *args):
+    """
+    Run fn(*args) once for all concurrent requests with the same key and share
+    its result or error. Frames flagged as mock data mark every waiting request,
+    so none of them caches a fallback response. Results the async server
+    already fetched are passed in g.prefetched and used as they are.
+    """
+    prefetched = g.get('prefetched', {})
+    if key in prefetched:
+        result = prefetched[key]
+    else:
+        result = upstream_flight.do(key, fn, *args)
+    if isinstance(result, pd.DataFrame) and result.attrs.get('mock'):
+        g.served_mock = True
+    return result
+
+def upstream_outcome(result):
+    """'ok', 'empty' (no bars) or 'error' (HTTP error status) for an upstream result"""
+    if result is None:
+        return 'empty'
+    if isinstance(result, pd.DataFrame):
+        return 'empty' if result.empty else 'ok'
+    return 'ok' if result.status_code < 400 else 'error'
+
+def timed_upstream(upstream, method, fn):
+    """fn wrapped to record each call's duration and outcome in upstream_latency"""
+    @functools.wraps(fn)
+    def timed(*args, **kwargs):
+        started = time.perf_counter()
+        outcome = 'error'
+        try:
+            result = fn(*args, **kwargs)
+            outcome = upstream_outcome(result)
+            return result
+        finally:
+            upstream_latency.observe(time.perf_counter() - started, upstream, method, outcome)
+    return timed
+
+def ticker_key(tickers):
+    """Symbols of a yf.download tickers argument as one string"""
+    symbols = tickers.split() if isinstance(tickers, str) else list(tickers)
+    return ','.join(sorted(symbol.upper() for symbol in symbols))
+
+def yf_download(tickers, **kwargs):
+    """yf.download through the cassette layer"""
+    return cassettes.call('yahoo_download', ticker_key(tickers), kwargs, yf.download, tickers, **kwargs)
+
+def yf_history(symbol, **kwargs):
+    """yf.Ticker(symbol).history through the cassette layer"""
+    return cassettes.call('yahoo_history', symbol, kwargs, lambda: yf.Ticker(symbol).history(**kwargs))
+
+def tickertick_key(url):
+    """(symbol, query parameters) of a TickerTick feed URL"""
+    query = dict(parse_qsl(urlsplit(url).query))
+    match = re.search(r'tt:([^\s()]+)', query.get('q', ''))
+    return (match.group(1).upper() if match else 'UNKNOWN'), query
+
+def tickertick_get(url):
+    """tickertick_http.get through the cassette layer, timed per page"""
+    fetch = timed_upstream('tickertick', 'page', cassettes.call)
+    return fetch('tickertick', *tickertick_key(url), tickertick_http.get, url)
+
+def bars_since(data, since_date):
+    """Keep only bars on days after since_date"""
+    dates = pd.DatetimeIndex(data.index)
+    if dates.tz is not None:
+        dates = dates.tz_localize(None)
+    return data[dates.normalize() > since_date]
+
 def getHistoricPrice(stockSym):
     """
     Get historical price data for a stock symbol using yfinance
@@ -25,17 +461,19 @@ def getHistoricPrice(stockSym):
     """
     try:
         logger.info(f"Attempting to get historic price data for {stockSym}")
-        yfdf = yf.download(tickers={stockSym},period='3mo')
+        with timing_span('yfinance'):
+            yfdf = yahoo_breaker.call(timed_upstream('yahoo_finance', 'historic', yf_download), tickers={stockSym}, period='3mo')
         
         if yfdf.empty:
             logger.warning(f"No data returned from yfinance for {stockSym}, using mock data")
             return generateMockHistoricPrice(stockSym)
         
-        df2 = yfdf.drop(columns=['High', 'Low', 'Adj Close'])
-        df2 = df2.reset_index()
-        df2 = df2.rename(columns={'Date':'date','Open':'open','Close':'close','Volume':'volume'})
-        df2.close = np.around(df2.close).astype(int)
-        df2.open = np.around(df2.open).astype(int)
+        with timing_span('reshape'):
+            df2 = yfdf.drop(columns=['High', 'Low', 'Adj Close'])
+            df2 = df2.reset_index()
+            df2 = df2.rename(columns={'Date':'date','Open':'open','Close':'close','Volume':'volume'})
+            df2.close = np.around(df2.close).astype(int)
+            df2.open = np.around(df2.open).astype(int)
         logger.info(f"Successfully got historic price data for {stockSym}")
         return df2
     except Exception as e:
@@ -45,36 +483,131 @@ def getHistoricPrice(stockSym):
 
 def generateMockHistoricPrice(stockSym):
     """
-    Generate mock historic price data when yfinance fails
+    Generate mock historic price data when yfinance fails: 90 days of
+    synthetic daily bars for the symbol, shaped like getHistoricPrice output
     """
-    import random
-    from datetime import datetime, timedelta
-    
-    # Generate 90 days of mock data
-    end_date = datetime.now()
-    start_date = end_date - timedelta(days=90)
-    
-    mock_data = []
-    current_price = 150.0  # Starting price
+    bars = synthetic_bars(stockSym, '3mo', '1d', seed=MOCK_SEED)
+    df = bars.drop(columns=['High', 'Low']).rename_axis('date').reset_index()
+    df = df.rename(columns={'Open': 'open', 'Close': 'close', 'Volume': 'volume'})
+    df.close = np.around(df.close).astype(int)
+    df.open = np.around(df.open).astype(int)
+    df.attrs['mock'] = True
+    return df
+
+def period_start(period):
+    """Return the first day of a price-store period as a Timestamp (None for 'max')"""
+    if period == 'max':
+        return None
+    return pd.Timestamp(datetime.now() - timedelta(days=PERIOD_DAYS[period])).normalize()
+
+def build_stock_info(symbol, current_price):
+    """Placeholder company details sent alongside price data"""
+    return {
+        'symbol': symbol,
+        'name': f'{symbol} Inc.',
+        'sector': 'Technology',
+        'industry': 'Consumer Electronics',
+        'market_cap': 2500000000000,  # 2.5T
+        'current_price': current_price
+    }
+
+def get_stored_price_data(symbol, period):
+    """
+    Serve daily bars from the local price store, downloading only the bars
+    after the last stored date. Returns None if the store does not yet cover
+    the requested period, so the caller falls back to a full download.
+    """
+    start_date = period_start(period)
+    try:
+        if not price_store.covers(symbol, start_date):
+            return None
+        delta_start = price_store.delta_start(symbol)
+        if delta_start is not None:
+            # Re-fetch the last two stored bars so a partial trading day is refreshed
+            # and a split or dividend re-adjustment of the history is noticed.
+            # While Yahoo is unavailable the stored bars are served as they are.
+            try:
+                delta = yahoo_breaker.call(
+                    timed_upstream('yahoo_finance', 'store_delta', yf_download),
+                    symbol, start=delta_start.strftime('%Y-%m-%d'), progress=False, timeout=30
+                )
+                if delta is not None and not delta.empty and not price_store.append_delta(symbol, delta):
+                    logger.info(f"Stored bars for {symbol} were re-adjusted upstream, downloading in full")
+                    return None
+            except CircuitOpenError:
+                logger.warning(f"Yahoo Finance circuit open, serving stored bars for {symbol} without refresh")
+        data = price_store.load(symbol, start_date)
+        if data.empty:
+            return None
+        logger.info(f"Served {len(data)} bars for {symbol} from price store")
+        return data
+    except Exception as e:
+        logger.warning(f"Price store lookup failed for {symbol}: {str(e)}")
+        return None
+
+def tickertick_page_url(stock_sym, last_id=None):
+    """TickerTick feed URL for the page of stock_sym stories below last_id (the newest page for None)"""
+    feed_url = TICKERTICK_FEED_URL.format(symbol=stock_sym)
+    return feed_url if last_id is None else f"{feed_url}&last={last_id}"
+
+def fetch_tickertick_page(stock_sym, last_id=None):
+    """Fetch one page of TickerTick stories for stock_sym, newest first"""
+    response = tickertick_breaker.call(tickertick_get, tickertick_page_url(stock_sym, last_id))
+    return json.loads(response.text)['stories']
+
+def collect_stories(pages):
+    """
+    Build one DataFrame from a stream of story pages with a single
+    normalization pass, converting the millisecond timestamps to datetimes
+    """
+    stories = [story for page in pages for story in page]
+    ttdf = json_normalize(stories)
+    if not ttdf.empty:
+        ttdf['time'] = pd.to_datetime(ttdf['time'], unit="ms")
+    return ttdf
+
+def iter_news_sync(stock_sym, max_pages, horizon_days=NEWS_HORIZON_DAYS):
+    """
+    Bring the news store up to date for stock_sym (see NewsSync), yielding
+    each fetched page of stories as soon as it is stored.
+    If TickerTick fails or the caller stops early, the walk ends there and
+    coverage is recorded for what was fetched.
+    """
+    sync = NewsSync(news_store, stock_sym, max_pages, horizon_days)
+    try:
+        sync.start()
+        while not sync.done:
+            stories = fetch_tickertick_page(stock_sym, sync.last_id)
+            sync.add_page(stories)
+            if stories:
+                yield stories
+    except Exception as e:
+        logger.warning(f"News sync failed for {stock_sym}, serving stored stories: {str(e)}")
+    finally:
+        sync.finish()
+
+def sync_news_stories(stock_sym, max_pages, horizon_days=NEWS_HORIZON_DAYS):
+    """
+    Bring the news store up to date for stock_sym (see iter_news_sync) and
+    return its stories within the horizon as a DataFrame. If TickerTick
+    fails, whatever is stored is served.
+    """
+    for _ in iter_news_sync(stock_sym, max_pages, horizon_days):
+        pass
+    cutoff_ms = (datetime.now() - timedelta(days=horizon_days)).timestamp() * 1000
+    return collect_stories([news_store.load(stock_sym, since_ms=cutoff_ms)])
+
+def shape_tt_news(ttdf):
+    """Date, shorten and rename synced stories for /api/stock-news-tt, newest first without duplicates"""
+    if ttdf.empty:
+        return ttdf
     
-    current_date = start_date
-    while current_date <= end_date:
-        # Skip weekends
-        if current_date.weekday() < 5:  # Monday = 0, Friday = 4
-            # Add some randomness to price
-            change = (random.random() - 0.5) * 8  # -4 to +4
-            current_price = max(50, min(300, current_price + change))
-            
-            mock_data.append({
-                'date': current_date,
-                'open': int(current_price - random.random() * 2),
-                'close': int(current_price),
-                'volume': random.randint(1000000, 5000000)
-            })
-        
-        current_date += timedelta(days=1)
+    ttdf['time'] = ttdf['time'].dt.date
+    ttdf['title'] = ttdf['title'].str.slice(0, 90) + "..."
+    ttdf = ttdf.rename(columns={"time": "pubdate", "url": "link"})
     
-    return pd.DataFrame(mock_data)
+    # Sort by date (newest first) and remove duplicates
+    return ttdf.sort_values('pubdate', ascending=False, kind='stable').drop_duplicates(subset=['title', 'pubdate'])
 
 def getStockNewsTT(stockSym):
     """
@@ -83,47 +616,7 @@ def getStockNewsTT(stockSym):
     try:
         logger.info(f"Fetching news for {stockSym} from TickerTick API")
         
-        continueloop = 1
-        url = ""
-        text = ""
-        hours_ago = 1
-        lastID = 0
-        urllink = f"https://api.tickertick.com/feed?q=(and tt:{stockSym} (or s:tickerreport s:seekingalpha))&lang=en&n=200"
-        ttdf = pd.DataFrame()
-        
-        while continueloop != 0:
-            url = requests.get(urllink, timeout=30)
-            text = url.text
-            ttjson = json.loads(text)
-            tmpdf = json_normalize(ttjson['stories']) 
-            tmpdf['time'] = pd.to_datetime(tmpdf['time'], unit="ms")
-            ttdf = pd.concat([ttdf, tmpdf], axis=0)
-            
-            if (ttdf.iloc[-1]['time'] > datetime.today() - timedelta(days=90)):
-                lastdate = ttdf.iloc[-1]['time']
-                hour_offset = int((datetime.today() - lastdate).total_seconds() / 3600)
-                hours_ago = hours_ago + hour_offset
-                urllink = f"https://api.tickertick.com/feed?q=(and tt:{stockSym} (or s:tickerreport s:seekingalpha))&lang=en&hours_ago={hours_ago}"
-                
-                # Attempt to use fin_news and last story ID
-                lastID = ttdf.iloc[-1]['id']
-                urllink = f"https://api.tickertick.com/feed?q=(and tt:{stockSym} (or s:tickerreport s:seekingalpha))&lang=en&n=200&last={lastID}"
-                
-                # Temp using 2 to stop the loop
-                if continueloop < 2:  # in case of runaway train
-                    continueloop = continueloop + 1
-                else:
-                    continueloop = 0
-            else:
-                continueloop = 0
-        
-        ttdf['time'] = pd.to_datetime(ttdf['time'], unit="ms")
-        ttdf['time'] = ttdf['time'].dt.date
-        ttdf['title'] = ttdf['title'].str.slice(0, 90) + "..."
-        ttdf = ttdf.rename(columns={"time": "pubdate", "url": "link"})
-        
-        # Sort by date (newest first) and remove duplicates
-        ttdf = ttdf.sort_values('pubdate', ascending=False).drop_duplicates(subset=['title', 'pubdate'])
+        ttdf = shape_tt_news(sync_news_stories(stockSym, max_pages=NEWS_TT_MAX_PAGES))
         
         logger.info(f"Successfully fetched {len(ttdf)} news entries for {stockSym}")
         return ttdf
@@ -132,7 +625,92 @@ def getStockNewsTT(stockSym):
         logger.error(f"Error fetching news for {stockSym}: {str(e)}")
         return pd.DataFrame()
 
+def fetch_stock_data(symbol, period, interval):
+    """
+    Run the Yahoo Finance fallback chain for symbol as hedged attempts:
+    each method gets YF_HEDGE_DELAY seconds before the next one is started
+    alongside it, and the whole chain is bounded by YF_DEADLINE seconds.
+    Returns a DataFrame of bars, or None if every method failed
+    """
+    # Calculate date range based on period
+    end_date = datetime.now()
+    start_date = end_date - timedelta(days=PERIOD_DAYS.get(period, 180))  # Default to 6 months
+    
+    # Serve daily bars from the local store when it already covers the period
+    use_store = interval == '1d' and (period in PERIOD_DAYS or period == 'max')
+    
+    def from_store():
+        return get_stored_price_data(symbol, period)
+    
+    # Method 1: Direct download with period parameter
+    def method_1():
+        logger.info(f"Trying method 1: yf.download with period={period}")
+        return yahoo_breaker.call(yf_download, symbol, period=period, progress=False, timeout=30)
+    
+    # Method 2: Download with date range
+    def method_2():
+        logger.info(f"Trying method 2: yf.download with date range")
+        return yahoo_breaker.call(yf_download, symbol, start=start_date, end=end_date, progress=False, timeout=30)
+    
+    # Method 3: Use Ticker object
+    def method_3():
+        logger.info(f"Trying method 3: Ticker object")
+        return yahoo_breaker.call(yf_history, symbol, period=period)
+    
+    # Method 4: Use getHistoricPrice function (simpler approach)
+    def method_4():
+        logger.info(f"Trying method 4: getHistoricPrice function")
+        df = getHistoricPrice(symbol)
+        # Mock data is left to the caller, which generates bars for the requested period and interval
+        if df.empty or df.attrs.get('mock'):
+            return None
+        # Convert the getHistoricPrice format to match our expected format
+        data = df.set_index('date').rename(columns={'open': 'Open', 'close': 'Close', 'volume': 'Volume'})
+        data['High'] = data['Close']  # Use close as high for simplicity
+        data['Low'] = data['Open']    # Use open as low for simplicity
+        data['Adj Close'] = data['Close']  # Add Adj Close column
+        data.attrs.update(df.attrs)
+        return data
+    
+    attempts = [
+        (name, timed_upstream('yahoo_finance', name.replace(' ', '_'), method))
+        for name, method in (('method 1', method_1), ('method 2', method_2), ('method 3', method_3), ('method 4', method_4))
+    ]
+    if use_store:
+        attempts.insert(0, ('store', from_store))
+    
+    logger.info(f"Attempting to download data for {symbol} from {start_date} to {end_date}")
+    with timing_span('yfinance') as span:
+        method, data = run_hedged(
+            attempts,
+            yf_executor,
+            hedge_delay=YF_HEDGE_DELAY,
+            deadline=YF_DEADLINE,
+            is_good=lambda df: df is not None and not df.empty
+        )
+        span['desc'] = method or 'failed'
+    if method is None:
+        logger.error(f"Yahoo Finance fallback chain failed for {symbol}")
+        return None
+    logger.info(f"{method.capitalize()} successful for {symbol}")
+    
+    # Keep full downloads so the next request only needs the delta.
+    # Method 4 returns reshaped 3mo data, so it is never stored, and
+    # method 2 only spans the default 6 months when period is 'max'.
+    if use_store and (method in ('method 1', 'method 3') or (method == 'method 2' and period != 'max')):
+        try:
+            coverage_start = None if period == 'max' else pd.Timestamp(start_date).normalize()
+            price_store.append(symbol, data, coverage_start)
+        except Exception as e:
+            logger.warning(f"Failed to store price data for {symbol}: {str(e)}")
+    
+    return data
+
 @app.route('/api/stock-data', methods=['GET'])
+@cached_response('stock-data', {
+    'period': '6mo', 'interval': '1d', 'format': 'json', 'delta': None, 'max_points': None, 'downsample': 'lttb',
+    'since': None
+})
 def get_stock_data():
     """
     Fetch stock data from Yahoo Finance with automatic fallback to mock data
@@ -140,7 +718,23 @@ def get_stock_data():
     - symbol: Stock symbol (e.g., 'AAPL', 'GOOGL')
     - period: Time period ('1d', '5d', '1mo', '3mo', '6mo', '1y', '2y', '5y', '10y', 'ytd', 'max')
     - interval: Data interval ('1m', '2m', '5m', '15m', '30m', '60m', '90m', '1h', '1d', '5d', '1wk', '1mo', '3mo')
+    - format: Response format ('json', 'columnar', 'msgpack', 'arrow'), see price_data_response
+    - delta: '1' to delta-encode dates and prices in columnar/msgpack responses
+    - max_points: Downsample to at most this many bars (optional)
+    - downsample: 'lttb' (default) keeps the bars that best preserve the close price line,
+      'ohlc' aggregates consecutive bars into buckets
+    - since: Only return bars after this date (YYYY-MM-DD)
     """
+    error = format_error()
+    if error is not None:
+        return error
+    try:
+        max_points, downsample_method = downsample_args()
+        since = request.args.get('since')
+        since_date = parse_since_date(since) if since else None
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    
     try:
         # Get query parameters
         symbol = request.args.get('symbol', 'AAPL').upper()
@@ -150,117 +744,41 @@ def get_stock_data():
         logger.info(f"Fetching data for {symbol} with period={period}, interval={interval}")
         
         # Try to get real data from Yahoo Finance
-        data = None
+        with timing_span('fetch'):
+            data = shared_fetch(('stock-data', symbol, period, interval), fetch_stock_data, symbol, period, interval)
         
-        try:
-            # Calculate date range based on period
-            end_date = datetime.now()
-            if period == '1mo':
-                start_date = end_date - timedelta(days=30)
-            elif period == '3mo':
-                start_date = end_date - timedelta(days=90)
-            elif period == '6mo':
-                start_date = end_date - timedelta(days=180)
-            elif period == '1y':
-                start_date = end_date - timedelta(days=365)
-            elif period == '2y':
-                start_date = end_date - timedelta(days=730)
-            elif period == '5y':
-                start_date = end_date - timedelta(days=1825)
-            else:
-                start_date = end_date - timedelta(days=180)  # Default to 6 months
-            
-            logger.info(f"Attempting to download data for {symbol} from {start_date} to {end_date}")
-            
-            # Try multiple approaches to get data
-            # Method 1: Direct download with period parameter
-            try:
-                logger.info(f"Trying method 1: yf.download with period={period}")
-                data = yf.download(symbol, period=period, progress=False, timeout=30)
-                if data is not None and not data.empty:
-                    logger.info(f"Method 1 successful for {symbol}")
-            except Exception as e1:
-                logger.warning(f"Method 1 failed for {symbol}: {str(e1)}")
-                data = None
+        # If we got real data, return it
+        if data is not None and not data.empty:
+            # Get current price from the latest data, before since= trims it away
+            close = price_column(data, 'Close')
+            latest_price = float(close.iloc[-1])
             
-            # Method 2: Download with date range
-            if data is None or data.empty:
-                try:
-                    logger.info(f"Trying method 2: yf.download with date range")
-                    data = yf.download(symbol, start=start_date, end=end_date, progress=False, timeout=30)
-                    if data is not None and not data.empty:
-                        logger.info(f"Method 2 successful for {symbol}")
-                except Exception as e2:
-                    logger.warning(f"Method 2 failed for {symbol}: {str(e2)}")
-                    data = None
+            if since_date is not None:
+                with timing_span('filter'):
+                    data = bars_since(data, since_date)
             
-            # Method 3: Use Ticker object
-            if data is None or data.empty:
-                try:
-                    logger.info(f"Trying method 3: Ticker object")
-                    ticker = yf.Ticker(symbol)
-                    data = ticker.history(period=period)
-                    if data is not None and not data.empty:
-                        logger.info(f"Method 3 successful for {symbol}")
-                except Exception as e3:
-                    logger.warning(f"Method 3 failed for {symbol}: {str(e3)}")
-                    data = None
+            # Reduce long ranges to what the chart can show before serializing
+            with timing_span('downsample'):
+                data = downsample_bars(data, max_points, downsample_method)
             
-            # Method 4: Use getHistoricPrice function (simpler approach)
-            if data is None or data.empty:
-                try:
-                    logger.info(f"Trying method 4: getHistoricPrice function")
-                    df = getHistoricPrice(symbol)
-                    if not df.empty:
-                        # Convert the getHistoricPrice format to match our expected format
-                        data = df.set_index('date')
-                        data['High'] = data['close']  # Use close as high for simplicity
-                        data['Low'] = data['open']    # Use open as low for simplicity
-                        data['Adj Close'] = data['close']  # Add Adj Close column
-                        logger.info(f"Method 4 successful for {symbol}")
-                except Exception as e4:
-                    logger.warning(f"Method 4 failed for {symbol}: {str(e4)}")
-                    data = None
-                    
-        except Exception as e:
-            logger.error(f"Error in Yahoo Finance API calls for {symbol}: {str(e)}")
-            data = None
-        
-        # If we got real data, return it
-        if data is not None and not data.empty:
             # Convert to JSON-friendly format
-            stock_data = []
-            for date, row in data.iterrows():
-                stock_data.append({
-                    'date': date.strftime('%Y-%m-%d'),
-                    'open': float(row['Open']),
-                    'high': float(row['High']),
-                    'low': float(row['Low']),
-                    'close': float(row['Close']),
-                    'volume': int(row['Volume'])
-                })
-            
-            # Get current price from the latest data
-            latest_price = stock_data[-1]['close'] if stock_data else 0
+            with timing_span('reshape'):
+                stock_data = price_columns(data)
             
             # Stock info
-            stock_info = {
-                'symbol': symbol,
-                'name': f'{symbol} Inc.',
-                'sector': 'Technology',
-                'industry': 'Consumer Electronics',
-                'market_cap': 2500000000000,  # 2.5T
-                'current_price': latest_price
-            }
+            stock_info = build_stock_info(symbol, latest_price)
             
-            return jsonify({
+            payload = {
                 'success': True,
                 'stock_info': stock_info,
-                'data': stock_data,
                 'period': period,
                 'interval': interval,
                 'source': 'yahoo_finance'
-            })
+            }
+            if since:
+                payload['since'] = since
+            with timing_span('serialize'):
+                return price_data_response(payload, stock_data)
         
         # If all methods failed, fall back to mock data
         logger.warning(f"All Yahoo Finance methods failed for {symbol}, falling back to mock data")
@@ -271,46 +789,232 @@ def get_stock_data():
         # Fall back to mock data on any error
         return get_mock_stock_data()
 
+def fetch_batch_stock_data(symbols, period, interval):
+    """
+    Fetch bars for several symbols with at most two multi-ticker yf.download
+    calls: one delta download for symbols the price store already covers and
+    one full download for the rest. Returns ({symbol: DataFrame}, {symbol: source}).
+    """
+    frames = {}
+    sources = {}
+    use_store = interval == '1d' and (period in PERIOD_DAYS or period == 'max')
+    start_date = period_start(period) if use_store else None
+    
+    stored = {}
+    missing = []
+    for symbol in symbols:
+        if use_store and price_store.covers(symbol, start_date):
+            stored[symbol] = price_store.delta_start(symbol)
+        else:
+            missing.append(symbol)
+    
+    if stored:
+        # Refresh every stored symbol from the oldest delta start in one call.
+        # Symbols whose history was re-adjusted upstream are downloaded in full.
+        delta_starts = [date for date in stored.values() if date is not None]
+        try:
+            if delta_starts:
+                delta = yahoo_breaker.call(
+                    timed_upstream('yahoo_finance', 'batch_delta', yf_download), list(stored), start=min(delta_starts).strftime('%Y-%m-%d'),
+                    group_by='ticker', progress=False, timeout=30
+                )
+                for symbol, frame in split_tickers(delta, list(stored)).items():
+                    if not price_store.append_delta(symbol, frame):
+                        del stored[symbol]
+                        missing.append(symbol)
+        except Exception as e:
+            logger.warning(f"Batch delta download failed, serving stored bars as they are: {str(e)}")
+        for symbol in stored:
+            data = price_store.load(symbol, start_date)
+            if not data.empty:
+                frames[symbol] = data
+                sources[symbol] = 'price_store'
+            else:
+                missing.append(symbol)
+    
+    if missing:
+        logger.info(f"Downloading {len(missing)} symbols in one batch with period={period}, interval={interval}")
+        try:
+            data = yahoo_breaker.call(
+                timed_upstream('yahoo_finance', 'batch', yf_download), missing, period=period, interval=interval,
+                group_by='ticker', progress=False, timeout=30
+            )
+            for symbol, frame in split_tickers(data, missing).items():
+                frames[symbol] = frame
+                sources[symbol] = 'yahoo_finance'
+                if use_store:
+                    price_store.append(symbol, frame, start_date)
+        except Exception as e:
+            logger.error(f"Batch download failed for {missing}: {str(e)}")
+    
+    return frames, sources
+
+@app.route('/api/stock-data/batch', methods=['GET'])
+def get_batch_stock_data():
+    """
+    Fetch stock data for several symbols in one request
+    Query parameters:
+    - symbols: Comma-separated stock symbols (e.g., 'AAPL,MSFT,GOOGL')
+    - period: Time period, as for /api/stock-data
+    - interval: Data interval, as for /api/stock-data
+    - format: 'json' (default) for per-day objects or 'columnar' for parallel arrays
+    - max_points, downsample: Per-symbol downsampling, as for /api/stock-data
+    """
+    try:
+        max_points, downsample_method = downsample_args()
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    
+    try:
+        symbols = list(dict.fromkeys(
+            s.strip().upper() for s in request.args.get('symbols', '').split(',') if s.strip()
+        ))
+        period = request.args.get('period', '6mo')
+        interval = request.args.get('interval', '1d')
+        fmt = request.args.get('format', 'json')
+        
+        if not symbols:
+            return jsonify({'error': 'symbols parameter is required'}), 400
+        if len(symbols) > BATCH_MAX_SYMBOLS:
+            return jsonify({'error': f'At most {BATCH_MAX_SYMBOLS} symbols per request'}), 400
+        if fmt not in ('json', 'columnar'):
+            return jsonify({'error': f"Unsupported format '{fmt}', expected json or columnar"}), 400
+        
+        logger.info(f"Fetching batch data for {len(symbols)} symbols with period={period}, interval={interval}")
+        
+        frames, sources = shared_fetch(
+            ('stock-data-batch', tuple(sorted(symbols)), period, interval),
+            fetch_batch_stock_data, symbols, period, interval
+        )
+        
+        results = {}
+        for symbol in symbols:
+            if symbol not in frames:
+                continue
+            columns = price_columns(downsample_bars(frames[symbol], max_points, downsample_method))
+            results[symbol] = {
+                'stock_info': build_stock_info(symbol, columns['close'][-1]),
+                'data': columns_to_records(columns) if fmt == 'json' else columns,
+                'source': sources[symbol]
+            }
+        
+        return json_response({
+            'success': True,
+            'period': period,
+            'interval': interval,
+            'results': results,
+            'missing': [symbol for symbol in symbols if symbol not in results]
+        })
+        
+    except Exception as e:
+        logger.error(f"Error in batch stock data API: {str(e)}")
+        return jsonify({'error': f'Failed to fetch batch stock data: {str(e)}'}), 500
+
+@app.route('/api/chart-bundle', methods=['GET'])
+@cached_response('chart-bundle', {
+    'period': '6mo', 'interval': '1d', 'format': 'json', 'max_points': None, 'downsample': 'lttb'
+})
+def get_chart_bundle():
+    """
+    Price bars and TickerTick news for one chart in a single response.
+    The news fetch runs alongside the price fetch, each story carries the
+    bar_date of the bar it belongs to and each bar a news_count. Stories
+    older than the first bar are left out and only counted.
+    Query parameters:
+    - symbol: Stock symbol (e.g., 'AAPL', 'GOOGL')
+    - period: Time period, as for /api/stock-data
+    - interval: Data interval, as for /api/stock-data
+    - format: 'json' (default) for per-day objects or 'columnar' for parallel arrays
+    - max_points: Downsample to at most this many bars (optional)
+    - downsample: 'lttb' (default) or 'ohlc', as for /api/stock-data
+    """
+    fmt = request.args.get('format', 'json')
+    if fmt not in BUNDLE_FORMATS:
+        return jsonify({'error': f"Unsupported format '{fmt}', expected json or columnar"}), 400
+    try:
+        max_points, downsample_method = downsample_args()
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    
+    try:
+        symbol = request.args.get('symbol', 'AAPL').upper()
+        period = request.args.get('period', '6mo')
+        interval = request.args.get('interval', '1d')
+        
+        logger.info(f"Fetching chart bundle for {symbol} with period={period}, interval={interval}")
+        
+        # Start the news fetch, then fetch prices on this thread while it runs
+        news_key = ('stock-news-tt', symbol)
+        prefetched = g.get('prefetched', {})
+        news_future = None
+        if news_key not in prefetched:
+            news_future = bundle_executor.submit(upstream_flight.do, news_key, getStockNewsTT, symbol)
+        data = shared_fetch(('stock-data', symbol, period, interval), fetch_stock_data, symbol, period, interval)
+        news_df = prefetched[news_key] if news_future is None else news_future.result()
+        
+        if data is not None and not data.empty:
+            close = price_column(data, 'Close')
+            latest_price = float(close.iloc[-1])
+            columns = price_columns(downsample_bars(data, max_points, downsample_method))
+            payload = {'success': True, 'source': 'yahoo_finance'}
+        else:
+            logger.warning(f"All Yahoo Finance methods failed for {symbol}, bundling mock data")
+            g.served_mock = True
+            data, latest_price = generate_mock_stock_data(symbol, period, interval)
+            columns = price_columns(downsample_bars(data, max_points, downsample_method))
+            payload = {'success': True, 'note': 'Mock data - yfinance connection issues'}
+        
+        news_list = news_records(news_df) if not news_df.empty else []
+        columns['news_count'] = join_news_to_bars(columns, news_list)
+        # The news horizon can reach past the bar window, those stories have no bar to sit on
+        charted = [record for record in news_list if record['bar_date'] is not None]
+        
+        payload.update({
+            'stock_info': build_stock_info(symbol, latest_price),
+            'period': period,
+            'interval': interval,
+            'data': columns if fmt == 'columnar' else columns_to_records(columns),
+            'news': charted,
+            'news_count': len(charted),
+            'news_before_first_bar': len(news_list) - len(charted)
+        })
+        return json_response(payload)
+        
+    except Exception as e:
+        logger.error(f"Error in chart bundle API: {str(e)}")
+        return jsonify({
+            'error': f'Failed to fetch chart bundle: {str(e)}',
+            'symbol': symbol if 'symbol' in locals() else 'Unknown'
+        }), 500
+
 @app.route('/api/search-stocks', methods=['GET'])
 def search_stocks():
     """
     Search for stocks by symbol or name
     Query parameters:
     - query: Search query string
+    - limit: Maximum number of results (default 10, at most 50)
     """
     try:
         query = request.args.get('query', '').strip()
         
         if not query:
             return jsonify({'error': 'Query parameter is required'}), 400
+        try:
+            limit = int(request.args.get('limit', 10))
+        except ValueError:
+            return jsonify({'error': 'limit must be an integer'}), 400
+        if not 1 <= limit <= SEARCH_MAX_RESULTS:
+            return jsonify({'error': f'limit must be between 1 and {SEARCH_MAX_RESULTS}'}), 400
         
         logger.info(f"Searching for stocks with query: {query}")
         
-        # For now, return some popular stocks that match the query
-        # In a real application, you might want to use a more sophisticated search
-        popular_stocks = [
-            {'symbol': 'AAPL', 'name': 'Apple Inc.'},
-            {'symbol': 'GOOGL', 'name': 'Alphabet Inc.'},
-            {'symbol': 'MSFT', 'name': 'Microsoft Corporation'},
-            {'symbol': 'AMZN', 'name': 'Amazon.com Inc.'},
-            {'symbol': 'TSLA', 'name': 'Tesla Inc.'},
-            {'symbol': 'META', 'name': 'Meta Platforms Inc.'},
-            {'symbol': 'NVDA', 'name': 'NVIDIA Corporation'},
-            {'symbol': 'NFLX', 'name': 'Netflix Inc.'},
-            {'symbol': 'DIS', 'name': 'The Walt Disney Company'},
-            {'symbol': 'JPM', 'name': 'JPMorgan Chase & Co.'}
-        ]
-        
-        # Filter stocks that match the query
-        matching_stocks = [
-            stock for stock in popular_stocks
-            if query.upper() in stock['symbol'].upper() or 
-               query.lower() in stock['name'].lower()
-        ]
+        # Ranked symbol prefix and company name matches from the symbol universe
+        matching_stocks = symbol_index.search(query, limit)
         
         return jsonify({
             'success': True,
-            'results': matching_stocks[:10]  # Limit to 10 results
+            'results': matching_stocks
         })
         
     except Exception as e:
@@ -322,176 +1026,287 @@ def health_check():
     """Health check endpoint"""
     return jsonify({
         'status': 'healthy',
-        'timestamp': datetime.now().isoformat()
+        'timestamp': datetime.now().isoformat(),
+        'cache': response_cache.stats(),
+        'single_flight': upstream_flight.stats(),
+        'upstreams': {
+            'yahoo_finance': yahoo_breaker.stats(),
+            'tickertick': tickertick_breaker.stats()
+        },
+        'cassettes': cassettes.stats(),
+        'prefetch': prefetcher.status() if PREFETCH_ENABLED else None,
+        'symbols': symbol_index.stats()
     })
 
+@app.route('/metrics', methods=['GET'])
+def get_metrics():
+    """Prometheus metrics of this process, in the text exposition format"""
+    return app.response_class(metrics.render(), content_type=METRICS_CONTENT_TYPE)
+
+@contextlib.contextmanager
+def timing_span(name):
+    """
+    Time a stage of the current request for its Server-Timing header. The
+    yielded dict takes an optional 'desc'. Outside a request, such as on the
+    yfinance executor threads, nothing is recorded.
+    """
+    span = {'desc': None}
+    started = time.perf_counter()
+    try:
+        yield span
+    finally:
+        if has_request_context():
+            g.setdefault('timing_spans', []).append((name, span['desc'], time.perf_counter() - started))
+
+def server_timing(spans, total=None):
+    """Server-Timing header value for (name, desc, seconds) spans, repeated names summed"""
+    merged = {}
+    for name, desc, elapsed in spans:
+        entry = merged.setdefault(name, [0.0, 0, desc])
+        entry[0] += elapsed
+        entry[1] += 1
+    parts = []
+    for name, (elapsed, count, desc) in merged.items():
+        if count > 1:
+            desc = f"{count} calls"
+        part = name if desc is None else f'{name};desc="{desc}"'
+        parts.append(f"{part};dur={elapsed * 1000:.1f}")
+    if total is not None:
+        parts.append(f"total;dur={total * 1000:.1f}")
+    return ', '.join(parts)
+
+def record_request(route, method, status, elapsed, size, served_mock):
+    """Record a finished request in the route metrics; size is None for streamed bodies"""
+    request_latency.observe(elapsed, route, method, str(status))
+    if size is not None:
+        response_size.observe(size, route)
+    if served_mock:
+        mock_fallbacks.inc(route)
+
+@app.before_request
+def start_profile():
+    if not PROFILE_ENABLED or request.args.get('profile') != '1':
+        return None
+    if not profile_lock.acquire(blocking=False):
+        return jsonify({'error': 'Another request is being profiled, try again'}), 429
+    g.profiler = cProfile.Profile()
+    g.profiler.enable()
+    return None
+
+@app.after_request
+def finish_profile(response):
+    """Replace a profiled request's response with its cProfile summary"""
+    profiler = g.pop('profiler', None)
+    if profiler is None:
+        return response
+    try:
+        profiler.disable()
+        sort = request.args.get('profile_sort', 'cumulative')
+        output = io.StringIO()
+        output.write(f"Profile of {request.full_path}: status {response.status_code}, "
+                     f"Server-Timing {response.headers.get('Server-Timing', '')}\n")
+        output.write("Only the request thread is profiled; work on executor threads shows up as waiting.\n\n")
+        stats = pstats.Stats(profiler, stream=output)
+        stats.sort_stats(sort if sort in PROFILE_SORTS else 'cumulative').print_stats(PROFILE_TOP)
+    finally:
+        profile_lock.release()
+    profiled = app.response_class(output.getvalue(), mimetype='text/plain')
+    profiled.headers['Server-Timing'] = response.headers.get('Server-Timing', '')
+    profiled.headers['Cache-Control'] = 'no-store'
+    return profiled
+
+@app.after_request
+def add_server_timing(response):
+    total = time.perf_counter() - g.metrics_started if 'metrics_started' in g else None
+    response.headers['Server-Timing'] = server_timing(g.get('timing_spans', []), total)
+    return response
+
+@app.teardown_request
+def end_profile(exc):
+    # A request that failed before finish_profile still releases the profiler
+    profiler = g.pop('profiler', None)
+    if profiler is not None:
+        profiler.disable()
+        profile_lock.release()
+
+@app.before_request
+def start_request_metrics():
+    g.metrics_route = request.url_rule.rule if request.url_rule is not None else 'unmatched'
+    g.metrics_started = time.perf_counter()
+    requests_in_flight.inc(g.metrics_route)
+
+@app.after_request
+def finish_request_metrics(response):
+    if 'metrics_started' in g:
+        record_request(
+            g.metrics_route, request.method, response.status_code, time.perf_counter() - g.metrics_started,
+            response.content_length, g.get('served_mock', False)
+        )
+    return response
+
+@app.teardown_request
+def end_request_metrics(exc):
+    if 'metrics_started' in g:
+        requests_in_flight.dec(g.metrics_route)
+
 # Serve frontend files
+def static_response(filename):
+    """
+    Serve an indexed frontend file in the best encoding the client accepts.
+    Content-hashed bundles are cached as immutable, everything else is
+    revalidated with its ETag. Returns None for files that are not indexed.
+    """
+    asset = static_assets.get(filename)
+    if asset is None:
+        return None
+    encoding, body = asset.negotiate(request.accept_encodings)
+    response = app.response_class(body, mimetype=asset.mimetype)
+    if encoding != 'identity':
+        response.headers['Content-Encoding'] = encoding
+    response.headers['Vary'] = 'Accept-Encoding'
+    response.headers['Cache-Control'] = asset.cache_control
+    response.set_etag(asset.etag if encoding == 'identity' else f'{asset.etag}-{encoding}')
+    return response.make_conditional(request)
+
 @app.route('/')
 def serve_index():
-    return send_from_directory('.', 'index.html')
+    return static_response('index.html') or send_from_directory('.', 'index.html')
 
 @app.route('/<path:filename>')
 def serve_static(filename):
-    # Set proper MIME types for different file types
-    if filename.endswith('.js'):
-        return send_from_directory('.', filename, mimetype='application/javascript')
-    elif filename.endswith('.css'):
-        return send_from_directory('.', filename, mimetype='text/css')
-    elif filename.endswith('.html'):
-        return send_from_directory('.', filename, mimetype='text/html')
-    elif filename.endswith('.png'):
-        return send_from_directory('.', filename, mimetype='image/png')
-    elif filename.endswith('.jpg') or filename.endswith('.jpeg'):
-        return send_from_directory('.', filename, mimetype='image/jpeg')
-    elif filename.endswith('.gif'):
-        return send_from_directory('.', filename, mimetype='image/gif')
-    elif filename.endswith('.ico'):
-        return send_from_directory('.', filename, mimetype='image/x-icon')
-    elif filename.endswith('.svg'):
-        return send_from_directory('.', filename, mimetype='image/svg+xml')
-    elif filename.endswith('.woff'):
-        return send_from_directory('.', filename, mimetype='font/woff')
-    elif filename.endswith('.woff2'):
-        return send_from_directory('.', filename, mimetype='font/woff2')
-    elif filename.endswith('.ttf'):
-        return send_from_directory('.', filename, mimetype='font/ttf')
-    elif filename.endswith('.eot'):
-        return send_from_directory('.', filename, mimetype='application/vnd.ms-fontobject')
-    else:
-        # For unknown file types, let Flask determine the MIME type
-        return send_from_directory('.', filename)
+    response = static_response(filename)
+    if response is not None:
+        return response
+    # Files added after startup or too large to index; None lets Flask guess the MIME type
+    return send_from_directory('.', filename, mimetype=MIMETYPES.get(os.path.splitext(filename)[1].lower()))
+
+def generate_mock_stock_data(symbol, period, interval='1d', seed=MOCK_SEED):
+    """
+    Generate synthetic bars for symbol covering period, for when yfinance is
+    not working. The bars are the same on every call for a (symbol, seed).
+    Returns (DataFrame of bars, last close).
+    """
+    data = synthetic_bars(symbol, period, interval, seed=seed)
+    return data, float(data['Close'].iloc[-1])
 
 @app.route('/api/mock-stock-data', methods=['GET'])
 def get_mock_stock_data():
-    """Mock stock data for testing when yfinance is not working"""
+    """
+    Mock stock data for testing when yfinance is not working
+    Query parameters:
+    - symbol, period, format, delta, max_points, downsample, since: as for /api/stock-data
+    - interval: Bar interval, as for /api/stock-data (default '1d'); unknown intervals get daily bars
+    - seed: Integer seed of the synthetic bars (default MOCK_SEED)
+    """
+    error = format_error()
+    if error is not None:
+        return error
+    try:
+        max_points, downsample_method = downsample_args()
+        seed = request.args.get('seed', MOCK_SEED)
+        if not str(seed).isdigit():
+            raise ValueError('seed must be a non-negative integer')
+        seed = int(seed)
+        since = request.args.get('since')
+        since_date = parse_since_date(since) if since else None
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    g.served_mock = True
     symbol = request.args.get('symbol', 'AAPL').upper()
     period = request.args.get('period', '6mo')
+    interval = request.args.get('interval', '1d')
+    if interval not in SYNTHETIC_INTERVALS:
+        interval = '1d'
     
-    # Generate mock data
-    import random
-    from datetime import datetime, timedelta
-    
-    # Calculate start date based on period
-    end_date = datetime.now()
-    if period == '7d':
-        start_date = end_date - timedelta(days=7)
-    elif period == '2w':
-        start_date = end_date - timedelta(days=14)
-    elif period == '1mo':
-        start_date = end_date - timedelta(days=30)
-    elif period == '3mo':
-        start_date = end_date - timedelta(days=90)
-    elif period == '6mo':
-        start_date = end_date - timedelta(days=180)
-    elif period == '1y':
-        start_date = end_date - timedelta(days=365)
-    else:
-        start_date = end_date - timedelta(days=30)  # Default to 1 month
-    
-    # Generate mock stock data
-    stock_data = []
-    current_price = 150.0  # Starting price
-    
-    current_date = start_date
-    while current_date <= end_date:
-        # Skip weekends
-        if current_date.weekday() < 5:  # Monday = 0, Friday = 4
-            # Add some randomness to price
-            change = (random.random() - 0.5) * 10  # -5 to +5
-            current_price = max(50, min(300, current_price + change))
-            
-            stock_data.append({
-                'date': current_date.strftime('%Y-%m-%d'),
-                'open': round(current_price - random.random() * 2, 2),
-                'high': round(current_price + random.random() * 3, 2),
-                'low': round(current_price - random.random() * 3, 2),
-                'close': round(current_price, 2),
-                'volume': random.randint(1000000, 5000000)
-            })
-        
-        current_date += timedelta(days=1)
+    data, current_price = generate_mock_stock_data(symbol, period, interval, seed)
     
     # Mock stock info
-    stock_info = {
-        'symbol': symbol,
-        'name': f'{symbol} Inc.',
-        'sector': 'Technology',
-        'industry': 'Consumer Electronics',
-        'market_cap': 2500000000000,  # 2.5T
-        'current_price': current_price
-    }
+    stock_info = build_stock_info(symbol, current_price)
     
-    return jsonify({
+    if since_date is not None:
+        data = bars_since(data, since_date)
+    
+    return price_data_response({
         'success': True,
         'stock_info': stock_info,
-        'data': stock_data,
         'period': period,
-        'interval': '1d',
+        'interval': interval,
         'note': 'Mock data - yfinance connection issues'
+    }, price_columns(downsample_bars(data, max_points, downsample_method)))
+
+def group_news_by_day(ttdf):
+    """
+    Aggregate a pubdate/title/link story frame into one row per day in a
+    single pass: stories are ordered by date once, the day boundaries found
+    with one comparison over the date array, and each day's stories sliced
+    out of the title and link arrays. Each row keeps its stories as a list of
+    {'title', 'link'} dicts in feed order, the headlines joined by <br> as
+    title and the first story's link as link.
+    """
+    ttdf = ttdf.sort_values('pubdate', kind='stable')
+    dates = ttdf['pubdate'].to_numpy()
+    titles = ttdf['title'].tolist()
+    links = ttdf['link'].tolist()
+    starts = np.flatnonzero(np.r_[True, dates[1:] != dates[:-1]])
+    ends = np.r_[starts[1:], len(dates)]
+    
+    stories = [
+        [{'title': title, 'link': link} for title, link in zip(titles[start:end], links[start:end])]
+        for start, end in zip(starts.tolist(), ends.tolist())
+    ]
+    return pd.DataFrame({
+        'pubdate': dates[starts],
+        'title': [''.join(story['title'] + '<br>' for story in day) for day in stories],
+        'link': [day[0]['link'] for day in stories],
+        'stories': stories
     })
 
+def shape_daily_news(ttdf):
+    """Date, shorten and rename synced stories for /api/stock-news, one row per day"""
+    if ttdf.empty:
+        return ttdf
+
+    ttdf['time'] = ttdf['time'].dt.date
+    ttdf['title'] = ttdf['title'].str.slice(0, 90) + "..."
+    ttdf = ttdf.rename(columns={"time": "pubdate", "url": "link"})
+
+    # Combine all stories in case there are multiple of them in a single day
+    return group_news_by_day(ttdf)
+
 def get_stock_news(stock_sym):
     """Fetch stock news from TickerTick API"""
     try:
-        continueloop = 1
-        url = ""
-        text = ""
-        hours_ago = 1
-        lastID = 0
-        urllink = f"https://api.tickertick.com/feed?q=(and tt:{stock_sym} (or s:tickerreport s:seekingalpha))&lang=en&n=200"
-
-        ttdf = pd.DataFrame()
-        while continueloop != 0:
-            url = requests.get(urllink)
-            text = url.text
-            ttjson = json.loads(text)
-            tmpdf = json_normalize(ttjson['stories']) 
-            tmpdf['time'] = pd.to_datetime(tmpdf['time'], unit="ms")
-            ttdf = pd.concat([ttdf, tmpdf], axis=0)
-            
-            if (ttdf.iloc[-1]['time'] > datetime.now() - timedelta(days=90)):
-                lastdate = ttdf.iloc[-1]['time']
-                hour_offset = int((datetime.now() - lastdate).total_seconds() / 3600)
-                hours_ago = hours_ago + hour_offset
-                urllink = f"https://api.tickertick.com/feed?q=(and tt:{stock_sym} (or s:tickerreport s:seekingalpha))&lang=en&hours_ago={hours_ago}"
-
-                lastID = ttdf.iloc[-1]['id']
-                urllink = f"https://api.tickertick.com/feed?q=(and tt:{stock_sym} (or s:tickerreport s:seekingalpha))&lang=en&n=200&last={lastID}"
-
-                if continueloop < 10:  # in case of runaway train
-                    continueloop = continueloop + 1
-                else:
-                    continueloop = 0
-            else:
-                continueloop = 0
-
-        ttdf['time'] = pd.to_datetime(ttdf['time'], unit="ms")
-        ttdf['time'] = ttdf['time'].dt.date
-        ttdf['title'] = ttdf['title'].str.slice(0, 90) + "..." + "<br>"
-        ttdf = ttdf.rename(columns={"time": "pubdate", "url": "link"})
-
-        # Combine all titles in case there are multiple of them in a single day
-        ttdf = ttdf.groupby('pubdate').agg({'title': 'sum', 'link': 'sum'})
-        ttdf = ttdf.reset_index()
-        
-        return ttdf
+        with timing_span('news_sync'):
+            stories = sync_news_stories(stock_sym, max_pages=NEWS_MAX_PAGES)
+        with timing_span('aggregate'):
+            return shape_daily_news(stories)
     except Exception as e:
         logger.error(f"Error fetching news for {stock_sym}: {str(e)}")
         return pd.DataFrame()
 
 @app.route('/api/stock-news', methods=['GET'])
+@cached_response('stock-news', {'since': None})
 def get_stock_news_api():
     """
     Fetch stock news from TickerTick API
     Query parameters:
     - symbol: Stock symbol (e.g., 'AAPL', 'GOOGL')
+    - since: Only return days after this date (YYYY-MM-DD)
     """
+    since = request.args.get('since')
+    if since:
+        try:
+            parse_since_date(since)
+        except ValueError as e:
+            return jsonify({'error': str(e)}), 400
+    
     try:
         symbol = request.args.get('symbol', 'AAPL').upper()
         
         logger.info(f"Fetching news for {symbol}")
         
-        news_data = get_stock_news(symbol)
+        with timing_span('fetch'):
+            news_data = shared_fetch(('stock-news', symbol), get_stock_news, symbol)
         
         if news_data.empty:
             return jsonify({
@@ -499,21 +1314,19 @@ def get_stock_news_api():
                 'symbol': symbol
             }), 404
         
+        with timing_span('filter'):
+            news_data = filter_news_since(news_data, since, allow_id=False)
+        
         # Convert to JSON-friendly format
-        news_list = []
-        for _, row in news_data.iterrows():
-            news_list.append({
-                'date': row['pubdate'].strftime('%Y-%m-%d') if hasattr(row['pubdate'], 'strftime') else str(row['pubdate']),
-                'title': row['title'],
-                'link': row['link']
+        with timing_span('serialize'):
+            news_list = news_records(news_data)
+            
+            return json_response({
+                'success': True,
+                'symbol': symbol,
+                'news': news_list
             })
         
-        return jsonify({
-            'success': True,
-            'symbol': symbol,
-            'news': news_list
-        })
-        
     except Exception as e:
         logger.error(f"Error in stock news API: {str(e)}")
         return jsonify({
@@ -521,7 +1334,20 @@ def get_stock_news_api():
             'symbol': symbol if 'symbol' in locals() else 'Unknown'
         }), 500
 
+@app.route('/api/stock-news/stream', methods=['GET'])
+def stream_stock_news_api():
+    """
+    Stream /api/stock-news entries as TickerTick pages arrive (see news_stream_response).
+    Entries for the same day can arrive in consecutive events.
+    Query parameters:
+    - symbol: Stock symbol (e.g., 'AAPL', 'GOOGL')
+    - format: 'ndjson' (default) or 'sse'
+    """
+    symbol = request.args.get('symbol', 'AAPL').upper()
+    return news_stream_response(symbol, NEWS_MAX_PAGES, lambda ttdf: news_records(shape_daily_news(ttdf)))
+
 @app.route('/api/historic-price', methods=['GET'])
+@cached_response('historic-price')
 def get_historic_price_api():
     """
     Get historical price data using the getHistoricPrice function
@@ -534,7 +1360,8 @@ def get_historic_price_api():
         logger.info(f"Fetching historic price data for {symbol}")
         
         # Get historical price data
-        df = getHistoricPrice(symbol)
+        with timing_span('fetch'):
+            df = shared_fetch(('historic-price', symbol), getHistoricPrice, symbol)
         
         if df.empty:
             return jsonify({
@@ -543,22 +1370,16 @@ def get_historic_price_api():
             }), 404
         
         # Convert DataFrame to JSON-friendly format
-        price_data = []
-        for _, row in df.iterrows():
-            price_data.append({
-                'date': row['date'].strftime('%Y-%m-%d') if hasattr(row['date'], 'strftime') else str(row['date']),
-                'open': int(row['open']),
-                'close': int(row['close']),
-                'volume': int(row['volume'])
+        with timing_span('serialize'):
+            price_data = historic_price_records(df)
+            
+            return json_response({
+                'success': True,
+                'symbol': symbol,
+                'data': price_data,
+                'note': 'Data rounded to integers, 90-day history from getHistoricPrice'
             })
         
-        return jsonify({
-            'success': True,
-            'symbol': symbol,
-            'data': price_data,
-            'note': 'Data rounded to integers, 90-day history from getHistoricPrice'
-        })
-        
     except Exception as e:
         logger.error(f"Error in historic price API: {str(e)}")
         return jsonify({
@@ -567,11 +1388,13 @@ def get_historic_price_api():
         }), 500
 
 @app.route('/api/stock-news-tt', methods=['GET'])
+@cached_response('stock-news-tt', {'since': None})
 def get_stock_news_tt_api():
     """
     Get stock news from TickerTick API using getStockNewsTT function
     Query parameters:
     - symbol: Stock symbol (e.g., 'AAPL', 'GOOGL')
+    - since: Only return stories after this date (YYYY-MM-DD) or TickerTick story id
     """
     try:
         symbol = request.args.get('symbol', 'AAPL').upper()
@@ -579,7 +1402,7 @@ def get_stock_news_tt_api():
         logger.info(f"Fetching TickerTick news for {symbol}")
         
         # Get news data using the new function
-        news_df = getStockNewsTT(symbol)
+        news_df = shared_fetch(('stock-news-tt', symbol), getStockNewsTT, symbol)
         
         if news_df.empty:
             return jsonify({
@@ -587,16 +1410,12 @@ def get_stock_news_tt_api():
                 'symbol': symbol
             }), 404
         
+        news_df = filter_news_since(news_df, request.args.get('since'))
+        
         # Convert DataFrame to JSON-friendly format
-        news_list = []
-        for _, row in news_df.iterrows():
-            news_list.append({
-                'date': row['pubdate'].strftime('%Y-%m-%d') if hasattr(row['pubdate'], 'strftime') else str(row['pubdate']),
-                'title': row['title'],
-                'link': row['link']
-            })
+        news_list = news_records(news_df)
         
-        return jsonify({
+        return json_response({
             'success': True,
             'symbol': symbol,
             'news': news_list,
@@ -611,5 +1430,60 @@ def get_stock_news_tt_api():
             'symbol': symbol if 'symbol' in locals() else 'Unknown'
         }), 500
 
+@app.route('/api/stock-news-tt/stream', methods=['GET'])
+def stream_stock_news_tt_api():
+    """
+    Stream /api/stock-news-tt stories as TickerTick pages arrive (see news_stream_response)
+    Query parameters:
+    - symbol: Stock symbol (e.g., 'AAPL', 'GOOGL')
+    - format: 'ndjson' (default) or 'sse'
+    """
+    symbol = request.args.get('symbol', 'AAPL').upper()
+    return news_stream_response(symbol, NEWS_TT_MAX_PAGES, lambda ttdf: news_records(shape_tt_news(ttdf)))
+
+def refresh_cached_view(endpoint, ttl=None, **args):
+    """
+    Render a cached view for the given query parameters outside any client
+    request, skipping the cached copy so the fresh response replaces it for
+    ttl seconds (the market-session TTL by default).
+    Raises if the view failed or had to fall back to mock data.
+    """
+    with app.test_request_context(query_string=args):
+        g.refresh_cache = True
+        g.cache_ttl = ttl
+        response = app.make_response(app.view_functions[endpoint]())
+        if response.status_code != 200:
+            raise RuntimeError(f"{endpoint} returned {response.status_code}")
+        if g.get('served_mock', False):
+            raise RuntimeError(f"{endpoint} fell back to mock data")
+
+def refresh_watched_prices(symbol):
+    """Refresh the stored bars for symbol and re-cache the price responses the frontend requests"""
+    ttl = prefetcher.entry_ttl('yahoo_finance', session_ttl())
+    for period in PREFETCH_PERIODS:
+        refresh_cached_view('get_stock_data', ttl=ttl, symbol=symbol, period=period, interval='1d')
+
+def refresh_watched_news(symbol):
+    """Refresh the stored stories for symbol and re-cache its /api/stock-news-tt response"""
+    refresh_cached_view('get_stock_news_tt_api', ttl=prefetcher.entry_ttl('tickertick', session_ttl()), symbol=symbol)
+
+# Background refresh of the watchlist so users never wait on a cold upstream fetch
+PREFETCH_ENABLED = os.environ.get('PREFETCH_ENABLED', '0') == '1'
+PREFETCH_WATCHLIST = [
+    symbol.strip().upper()
+    for symbol in os.environ.get('PREFETCH_WATCHLIST', ','.join(stock['symbol'] for stock in POPULAR_STOCKS)).split(',')
+    if symbol.strip()
+]
+PREFETCH_PERIODS = [period.strip() for period in os.environ.get('PREFETCH_PERIODS', '3mo').split(',') if period.strip()]
+# Most Yahoo Finance requests one /api/stock-data fetch sends: the price store's
+# delta download and the four fallback methods
+YF_MAX_REQUESTS_PER_FETCH = 5
+prefetcher = PrefetchScheduler([
+    ('yahoo_finance', YF_MAX_REQUESTS_PER_FETCH * len(PREFETCH_PERIODS), refresh_watched_prices),
+    ('tickertick', NEWS_TT_MAX_PAGES, refresh_watched_news),
+], PREFETCH_WATCHLIST)
+if PREFETCH_ENABLED:
+    prefetcher.start()
+
 if __name__ == '__main__':
     app.run(debug=True, host='0.0.0.0', port=5001) 
\ No newline at end of file
@@ -0,0 +1,251 @@
+"""
+Async serving mode for the slow upstream endpoints.
+
+/api/stock-data, /api/stock-news-tt, /api/historic-price and /api/chart-bundle
+wait on their upstreams without holding a thread: TickerTick pages are
+fetched with an async HTTP client and yfinance calls run in a bounded
+executor. Once the
+upstream data is in, the Flask view renders the response from it, so the
+JSON contracts, response cache, ETags and mock fallbacks stay the same.
+Every other route is served by the Flask app.
+
+Run with: uvicorn asgi_app:app --host 0.0.0.0 --port 8080
+"""
+import asyncio
+import contextlib
+import functools
+import json
+import logging
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import httpx
+import pandas as pd
+from a2wsgi import WSGIMiddleware
+from flask import g
+from starlette.applications import Starlette
+from starlette.concurrency import run_in_threadpool
+from starlette.middleware import Middleware
+from starlette.middleware.cors import CORSMiddleware
+from starlette.responses import Response
+from starlette.routing import Mount, Route
+
+import app as backend
+from http_client import DEFAULT_POOL_MAXSIZE, DEFAULT_RETRIES
+from news_sync import NewsSync
+from single_flight import AsyncSingleFlight
+
+logger = logging.getLogger(__name__)
+
+# Threads available to blocking yfinance fetches; requests beyond this wait in the event loop
+ASYNC_YF_WORKERS = int(os.environ.get('ASYNC_YF_WORKERS', 32))
+fetch_executor = ThreadPoolExecutor(max_workers=ASYNC_YF_WORKERS, thread_name_prefix='async-yfinance')
+
+# Coalesces identical upstream fetches awaited concurrently on the event loop
+async_flight = AsyncSingleFlight()
+
+# Opened for the lifetime of the server, see lifespan()
+tickertick_client = None
+
+
+async def tickertick_get(url):
+    """tickertick_client.get through the cassette layer, timed per page like app.tickertick_get"""
+    started = time.perf_counter()
+    outcome = 'error'
+    try:
+        response = await backend.cassettes.call_async(
+            'tickertick', *backend.tickertick_key(url), tickertick_client.get, url
+        )
+        outcome = backend.upstream_outcome(response)
+        return response
+    finally:
+        backend.upstream_latency.observe(time.perf_counter() - started, 'tickertick', 'page', outcome)
+
+
+async def fetch_tickertick_page(stock_sym, last_id=None):
+    """Async counterpart of app.fetch_tickertick_page over the shared async client"""
+    url = backend.tickertick_page_url(stock_sym, last_id)
+    response = await backend.tickertick_breaker.call_async(tickertick_get, url)
+    return json.loads(response.text)['stories']
+
+
+async def sync_news_stories(stock_sym, max_pages, horizon_days=backend.NEWS_HORIZON_DAYS):
+    """
+    Async driver of the same NewsSync walk as app.sync_news_stories: pages are
+    awaited on the event loop, while the blocking news store and pandas work
+    runs in the thread pool so a slow store never stalls other requests
+    """
+    sync = NewsSync(backend.news_store, stock_sym, max_pages, horizon_days)
+    try:
+        await run_in_threadpool(sync.start)
+        while not sync.done:
+            stories = await fetch_tickertick_page(stock_sym, sync.last_id)
+            await run_in_threadpool(sync.add_page, stories)
+    except Exception as e:
+        logger.warning(f"News sync failed for {stock_sym}, serving stored stories: {str(e)}")
+    finally:
+        await run_in_threadpool(sync.finish)
+    return await run_in_threadpool(lambda: backend.collect_stories([sync.load()]))
+
+
+async def get_stock_news_tt(symbol):
+    """Async counterpart of app.getStockNewsTT"""
+    try:
+        stories = await sync_news_stories(symbol, max_pages=backend.NEWS_TT_MAX_PAGES)
+        return await run_in_threadpool(backend.shape_tt_news, stories)
+    except Exception as e:
+        logger.error(f"Error fetching news for {symbol}: {str(e)}")
+        return pd.DataFrame()
+
+
+async def run_blocking(fn, *args):
+    """Run a blocking upstream fetch on the bounded executor"""
+    return await asyncio.get_running_loop().run_in_executor(fetch_executor, fn, *args)
+
+
+async def fetch_prices(symbol, period, interval):
+    """app.fetch_stock_data on the executor; errors count as a failed chain so the view serves mock data"""
+    try:
+        return await run_blocking(backend.fetch_stock_data, symbol, period, interval)
+    except Exception as e:
+        logger.error(f"Error fetching stock data: {str(e)}")
+        return None
+
+
+def price_args_valid(args):
+    """Whether get_stock_data will get as far as fetching for these query parameters"""
+    if backend.format_problem(args.get('format', 'json')):
+        return False
+    try:
+        backend.downsample_args(args)
+        since = args.get('since')
+        if since:
+            backend.parse_since_date(since)
+    except ValueError:
+        return False
+    return True
+
+
+def is_cached(endpoint, args):
+    return backend.response_cache.contains(backend.app.view_functions[endpoint].cache_key(args))
+
+
+def render_view(endpoint, request, prefetched):
+    """Render a Flask view for this request, with its upstream results already fetched"""
+    with backend.app.test_request_context(
+        request.url.path, query_string=request.url.query, headers=list(request.headers.items())
+    ):
+        g.prefetched = prefetched
+        response = backend.app.make_response(backend.app.view_functions[endpoint]())
+        request.state.served_mock = g.get('served_mock', False)
+        # Stages of the render only; the upstream wait happened before it on the event loop
+        timing = backend.server_timing(g.get('timing_spans', []))
+        if timing:
+            response.headers['Server-Timing'] = timing
+        return Response(response.get_data(), status_code=response.status_code, headers=dict(response.headers))
+
+
+def with_request_metrics(route):
+    """Record the route metrics of an async endpoint, as app.py's request hooks do for Flask routes"""
+    def decorator(endpoint):
+        @functools.wraps(endpoint)
+        async def wrapper(request):
+            backend.requests_in_flight.inc(route)
+            started = time.perf_counter()
+            status, size = 500, None
+            try:
+                response = await endpoint(request)
+                status, size = response.status_code, len(response.body)
+                return response
+            finally:
+                backend.requests_in_flight.dec(route)
+                backend.record_request(
+                    route, request.method, status, time.perf_counter() - started, size,
+                    getattr(request.state, 'served_mock', False)
+                )
+        return wrapper
+    return decorator
+
+
+@with_request_metrics('/api/stock-data')
+async def stock_data(request):
+    args = request.query_params
+    prefetched = {}
+    if price_args_valid(args) and not is_cached('get_stock_data', args):
+        symbol = args.get('symbol', 'AAPL').upper()
+        period = args.get('period', '6mo')
+        interval = args.get('interval', '1d')
+        key = ('stock-data', symbol, period, interval)
+        prefetched[key] = await async_flight.do(key, fetch_prices, symbol, period, interval)
+    return await run_in_threadpool(render_view, 'get_stock_data', request, prefetched)
+
+
+@with_request_metrics('/api/stock-news-tt')
+async def stock_news_tt(request):
+    args = request.query_params
+    prefetched = {}
+    if not is_cached('get_stock_news_tt_api', args):
+        symbol = args.get('symbol', 'AAPL').upper()
+        key = ('stock-news-tt', symbol)
+        prefetched[key] = await async_flight.do(key, get_stock_news_tt, symbol)
+    return await run_in_threadpool(render_view, 'get_stock_news_tt_api', request, prefetched)
+
+
+@with_request_metrics('/api/chart-bundle')
+async def chart_bundle(request):
+    args = request.query_params
+    prefetched = {}
+    if (args.get('format', 'json') in backend.BUNDLE_FORMATS and price_args_valid(args)
+            and not is_cached('get_chart_bundle', args)):
+        symbol = args.get('symbol', 'AAPL').upper()
+        period = args.get('period', '6mo')
+        interval = args.get('interval', '1d')
+        price_key = ('stock-data', symbol, period, interval)
+        news_key = ('stock-news-tt', symbol)
+        prefetched[price_key], prefetched[news_key] = await asyncio.gather(
+            async_flight.do(price_key, fetch_prices, symbol, period, interval),
+            async_flight.do(news_key, get_stock_news_tt, symbol)
+        )
+    return await run_in_threadpool(render_view, 'get_chart_bundle', request, prefetched)
+
+
+@with_request_metrics('/api/historic-price')
+async def historic_price(request):
+    args = request.query_params
+    prefetched = {}
+    if not is_cached('get_historic_price_api', args):
+        symbol = args.get('symbol', 'AAPL').upper()
+        key = ('historic-price', symbol)
+        # getHistoricPrice falls back to mock data itself instead of raising
+        prefetched[key] = await async_flight.do(key, run_blocking, backend.getHistoricPrice, symbol)
+    return await run_in_threadpool(render_view, 'get_historic_price_api', request, prefetched)
+
+
+@contextlib.asynccontextmanager
+async def lifespan(_app):
+    global tickertick_client
+    timeout = backend.tickertick_http.timeout_for(backend.TICKERTICK_FEED_URL)
+    tickertick_client = httpx.AsyncClient(
+        timeout=httpx.Timeout(timeout[1], connect=timeout[0]),
+        limits=httpx.Limits(max_connections=DEFAULT_POOL_MAXSIZE, max_keepalive_connections=DEFAULT_POOL_MAXSIZE),
+        transport=httpx.AsyncHTTPTransport(retries=DEFAULT_RETRIES)
+    )
+    try:
+        yield
+    finally:
+        await tickertick_client.aclose()
+        fetch_executor.shutdown(wait=False)
+
+
+app = Starlette(
+    routes=[
+        Route('/api/stock-data', stock_data, methods=['GET']),
+        Route('/api/stock-news-tt', stock_news_tt, methods=['GET']),
+        Route('/api/historic-price', historic_price, methods=['GET']),
+        Route('/api/chart-bundle', chart_bundle, methods=['GET']),
+        Mount('/', app=WSGIMiddleware(backend.app)),
+    ],
+    middleware=[Middleware(CORSMiddleware, allow_origins=['*'], allow_methods=['*'], allow_headers=['*'])],
+    lifespan=lifespan
+)
@@ -0,0 +1,84 @@
+"""
+Micro-benchmark of /api/stock-data serialization: the previous per-row
+iterrows() loop plus json.dumps against serialization.price_records() plus
+serialization.dumps(), for 100 to 10,000 daily bars.
+
+Usage:
+    python benchmarks/bench_serialization.py [--repeat N]
+"""
+import argparse
+import json
+import os
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from serialization import dumps, orjson, price_records  # noqa: E402
+
+SIZES = (100, 1000, 10000)
+
+
+def make_bars(n):
+    index = pd.bdate_range(end='2025-01-01', periods=n, name='Date')
+    close = 100 + np.cumsum(np.random.default_rng(0).normal(0, 1, n))
+    return pd.DataFrame({
+        'Open': close - 0.5,
+        'High': close + 1.0,
+        'Low': close - 1.0,
+        'Close': close,
+        'Volume': np.full(n, 1_000_000, dtype=np.int64)
+    }, index=index)
+
+
+def iterrows_records(data):
+    stock_data = []
+    for date, row in data.iterrows():
+        stock_data.append({
+            'date': date.strftime('%Y-%m-%d'),
+            'open': float(row['Open']),
+            'high': float(row['High']),
+            'low': float(row['Low']),
+            'close': float(row['Close']),
+            'volume': int(row['Volume'])
+        })
+    return stock_data
+
+
+def legacy(data):
+    return json.dumps({'data': iterrows_records(data)}).encode('utf-8')
+
+
+def vectorized(data):
+    return dumps({'data': price_records(data)})
+
+
+def best_of(fn, data, repeat):
+    best = float('inf')
+    for _ in range(repeat):
+        started = time.perf_counter()
+        fn(data)
+        best = min(best, time.perf_counter() - started)
+    return best
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--repeat', type=int, default=5, help='runs per measurement, best one is reported')
+    args = parser.parse_args()
+
+    print(f"JSON encoder: {'orjson' if orjson is not None else 'json (stdlib)'}")
+    print(f"{'bars':>8} {'iterrows rows/s':>18} {'vectorized rows/s':>18} {'speedup':>8}")
+    for n in SIZES:
+        data = make_bars(n)
+        assert json.loads(legacy(data)) == json.loads(vectorized(data))
+        before = best_of(legacy, data, args.repeat)
+        after = best_of(vectorized, data, args.repeat)
+        print(f"{n:>8} {n / before:>18,.0f} {n / after:>18,.0f} {before / after:>7.1f}x")
+
+
+if __name__ == '__main__':
+    main()
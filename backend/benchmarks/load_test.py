@@ -0,0 +1,302 @@
+"""
+Offline load test of the API. Yahoo Finance is replaced by FakeYahoo and
+TickerTick by a local TickerTickStandIn (see standins.py), each with a
+configurable latency and failure rate. The API server runs in a child
+process, so the load generator does not share its GIL, with fresh price
+and news stores. Each scenario is driven by --concurrency clients for
+--duration seconds after a warm-up, and p50/p95/p99 latency and requests
+per second are reported and written to a JSON file that a later run can
+compare against with --compare.
+
+Usage:
+    python benchmarks/load_test.py [--server flask|asgi] [--concurrency N] [--duration S]
+                                    [--scenarios stock-data,static] [--no-cache]
+                                    [--yahoo-latency S] [--yahoo-failure-rate P]
+                                    [--tickertick-latency S] [--tickertick-failure-rate P]
+                                    [--output results.json] [--compare baseline.json]
+"""
+import argparse
+import itertools
+import json
+import os
+import platform
+import socket
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+
+import numpy as np
+import requests
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, BACKEND_DIR)
+
+from standins import FakeYahoo, TickerTickStandIn  # noqa: E402
+
+RESULTS_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'results')
+
+SCENARIOS = {
+    'stock-data': ['/api/stock-data?symbol={symbol}&period=6mo&interval=1d'],
+    'stock-news-tt': ['/api/stock-news-tt?symbol={symbol}'],
+    'historic-price': ['/api/historic-price?symbol={symbol}'],
+    'static': ['/', '/styles.css', '/assets/main.js'],
+}
+
+DEFAULT_SYMBOLS = ['AAPL', 'GOOGL', 'MSFT', 'AMZN', 'TSLA', 'META', 'NVDA', 'NFLX', 'DIS', 'JPM']
+
+# Metrics compared between runs, and whether a higher value is better
+COMPARED_METRICS = (('p50_ms', False), ('p95_ms', False), ('p99_ms', False), ('rps', True))
+
+
+def symbols(count):
+    return DEFAULT_SYMBOLS[:count] + [f"T{i:04d}" for i in range(max(0, count - len(DEFAULT_SYMBOLS)))]
+
+
+def scenario_paths(name, symbol_list):
+    """Request paths of a scenario, one per template and symbol"""
+    return [template.format(symbol=symbol) for template in SCENARIOS[name] for symbol in
+            (symbol_list if '{symbol}' in template else [None])]
+
+
+def free_port():
+    with socket.socket() as sock:
+        sock.bind(('127.0.0.1', 0))
+        return sock.getsockname()[1]
+
+
+def serve(args):
+    """Child process: install the Yahoo stand-in, point news at the TickerTick stand-in and serve the API"""
+    import logging
+
+    import yfinance
+
+    FakeYahoo(args.yahoo_latency, args.yahoo_jitter, args.yahoo_failure_rate, args.seed).install(yfinance)
+
+    import app as backend
+
+    backend.TICKERTICK_FEED_URL = args.tickertick_url
+    logging.getLogger().setLevel(args.log_level)
+    logging.getLogger('werkzeug').setLevel(args.log_level)
+
+    if args.server == 'asgi':
+        import uvicorn
+
+        import asgi_app
+
+        uvicorn.run(asgi_app.app, host='127.0.0.1', port=args.port, log_level=args.log_level.lower(),
+                    access_log=False)
+    else:
+        from werkzeug.serving import make_server
+
+        make_server('127.0.0.1', args.port, backend.app, threaded=True).serve_forever()
+
+
+def start_server(args, tickertick_url, data_dir):
+    """Start the API in a child process and wait until /api/health answers"""
+    port = free_port()
+    env = dict(os.environ)
+    env.update({
+        'PRICE_STORE_PATH': os.path.join(data_dir, 'price_store.sqlite3'),
+        'NEWS_STORE_PATH': os.path.join(data_dir, 'news_store.sqlite3'),
+        'PREFETCH_ENABLED': '0',
+    })
+    if args.no_cache:
+        env['RESPONSE_CACHE_MAX_BYTES'] = '0'
+    command = [
+        sys.executable, os.path.abspath(__file__), '--serve', str(port), '--server', args.server,
+        '--tickertick-url', tickertick_url, '--log-level', args.log_level, '--seed', str(args.seed),
+        '--yahoo-latency', str(args.yahoo_latency), '--yahoo-jitter', str(args.yahoo_jitter),
+        '--yahoo-failure-rate', str(args.yahoo_failure_rate),
+    ]
+    output = None if args.verbose else subprocess.DEVNULL
+    process = subprocess.Popen(command, cwd=BACKEND_DIR, env=env, stdout=output, stderr=output)
+    base_url = f"http://127.0.0.1:{port}"
+    deadline = time.monotonic() + 60
+    while time.monotonic() < deadline:
+        if process.poll() is not None:
+            raise RuntimeError(f"API server exited with code {process.returncode}, rerun with --verbose")
+        try:
+            if requests.get(f"{base_url}/api/health", timeout=1).status_code == 200:
+                return process, base_url
+        except requests.RequestException:
+            pass
+        time.sleep(0.2)
+    process.kill()
+    raise RuntimeError('API server did not become healthy within 60 seconds')
+
+
+def drive(base_url, paths, concurrency, seconds):
+    """
+    Send requests for paths round-robin from concurrency threads for seconds.
+    Returns (latencies in seconds, status counts, mock responses, errors, elapsed seconds).
+    """
+    counter = itertools.count()
+    deadline = time.perf_counter() + seconds
+    lock = threading.Lock()
+    latencies = []
+    statuses = {}
+    totals = {'mock': 0, 'errors': 0}
+
+    def worker():
+        session = requests.Session()
+        local_latencies = []
+        local_statuses = {}
+        mock = errors = 0
+        while time.perf_counter() < deadline:
+            path = paths[next(counter) % len(paths)]
+            started = time.perf_counter()
+            try:
+                response = session.get(base_url + path, timeout=120)
+                body = response.content
+                local_latencies.append(time.perf_counter() - started)
+                local_statuses[response.status_code] = local_statuses.get(response.status_code, 0) + 1
+                errors += response.status_code >= 500
+                mock += response.headers.get('Content-Type', '').startswith('application/json') and b'Mock data' in body
+            except requests.RequestException:
+                errors += 1
+        with lock:
+            latencies.extend(local_latencies)
+            for status, count in local_statuses.items():
+                statuses[status] = statuses.get(status, 0) + count
+            totals['mock'] += mock
+            totals['errors'] += errors
+
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as executor:
+        for future in [executor.submit(worker) for _ in range(concurrency)]:
+            future.result()
+    return latencies, statuses, totals['mock'], totals['errors'], time.perf_counter() - started
+
+
+def summarize(latencies, statuses, mock, errors, elapsed):
+    summary = {
+        'requests': len(latencies),
+        'errors': errors,
+        'mock_responses': mock,
+        'statuses': {str(status): count for status, count in sorted(statuses.items())},
+        'elapsed_s': round(elapsed, 3),
+        'rps': round(len(latencies) / elapsed, 1) if elapsed else 0.0,
+    }
+    if latencies:
+        values = np.array(latencies) * 1000
+        p50, p95, p99 = np.percentile(values, [50, 95, 99])
+        summary.update({
+            'p50_ms': round(float(p50), 2),
+            'p95_ms': round(float(p95), 2),
+            'p99_ms': round(float(p99), 2),
+            'mean_ms': round(float(values.mean()), 2),
+            'max_ms': round(float(values.max()), 2),
+        })
+    return summary
+
+
+def compare(results, baseline):
+    """Print the change of each metric against a baseline run; returns the worst regression in percent"""
+    worst = 0.0
+    print(f"\nAgainst {baseline['started']} ({baseline['config']['server']} server):")
+    print(f"{'scenario':<16} {'metric':<8} {'baseline':>10} {'current':>10} {'change':>8}")
+    for name, current in results['scenarios'].items():
+        previous = baseline['scenarios'].get(name)
+        if previous is None:
+            continue
+        for metric, higher_is_better in COMPARED_METRICS:
+            if not previous.get(metric) or metric not in current:
+                continue
+            change = (current[metric] - previous[metric]) / previous[metric] * 100
+            regression = -change if higher_is_better else change
+            worst = max(worst, regression)
+            print(f"{name:<16} {metric:<8} {previous[metric]:>10} {current[metric]:>10} {change:>+7.1f}%")
+    return worst
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--server', choices=('flask', 'asgi'), default='flask',
+                        help="threaded Flask server or the async server in asgi_app.py")
+    parser.add_argument('--scenarios', default=','.join(SCENARIOS), help='comma-separated scenarios to run')
+    parser.add_argument('--concurrency', type=int, default=16, help='concurrent clients')
+    parser.add_argument('--duration', type=float, default=10, help='measured seconds per scenario')
+    parser.add_argument('--warmup', type=float, default=2, help='unmeasured seconds before each scenario')
+    parser.add_argument('--symbols', type=int, default=10, help='symbols cycled through by the API scenarios')
+    parser.add_argument('--no-cache', action='store_true', help='disable the response cache so every request does the work')
+    parser.add_argument('--yahoo-latency', type=float, default=0.2, help='median Yahoo Finance call seconds')
+    parser.add_argument('--yahoo-jitter', type=float, default=0.3, help='log-normal sigma of Yahoo Finance latency')
+    parser.add_argument('--yahoo-failure-rate', type=float, default=0.0, help='fraction of failed Yahoo Finance calls')
+    parser.add_argument('--tickertick-latency', type=float, default=0.15, help='median TickerTick page seconds')
+    parser.add_argument('--tickertick-jitter', type=float, default=0.3, help='log-normal sigma of TickerTick latency')
+    parser.add_argument('--tickertick-failure-rate', type=float, default=0.0, help='fraction of failed TickerTick pages')
+    parser.add_argument('--seed', type=int, default=0, help='seed of the stand-ins')
+    parser.add_argument('--output', help='results file (default: benchmarks/results/load_test-<time>.json)')
+    parser.add_argument('--compare', help='earlier results file to compare against')
+    parser.add_argument('--max-regression', type=float,
+                        help='exit with status 1 if a latency or rps metric regressed by more than this percent')
+    parser.add_argument('--log-level', default='WARNING', help='log level of the API server')
+    parser.add_argument('--verbose', action='store_true', help='show the API server output')
+    parser.add_argument('--serve', type=int, help=argparse.SUPPRESS)
+    parser.add_argument('--tickertick-url', help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.serve is not None:
+        args.port = args.serve
+        serve(args)
+        return
+
+    names = [name.strip() for name in args.scenarios.split(',') if name.strip()]
+    unknown = [name for name in names if name not in SCENARIOS]
+    if unknown:
+        parser.error(f"unknown scenarios {unknown}, choose from {list(SCENARIOS)}")
+
+    tickertick = TickerTickStandIn(args.tickertick_latency, args.tickertick_jitter,
+                                   args.tickertick_failure_rate, seed=args.seed).start()
+    started = datetime.now()
+    results = {
+        'started': started.isoformat(timespec='seconds'),
+        'config': {key: value for key, value in vars(args).items()
+                   if key not in ('serve', 'tickertick_url', 'output', 'compare', 'verbose')},
+        'environment': {'python': platform.python_version(), 'platform': platform.platform(),
+                        'cpus': os.cpu_count()},
+        'scenarios': {},
+    }
+    symbol_list = symbols(args.symbols)
+    with tempfile.TemporaryDirectory() as data_dir:
+        process, base_url = start_server(args, tickertick.feed_url, data_dir)
+        try:
+            print(f"{'scenario':<16} {'requests':>9} {'rps':>9} {'p50 ms':>9} {'p95 ms':>9} {'p99 ms':>9} {'errors':>7} {'mock':>6}")
+            for name in names:
+                paths = scenario_paths(name, symbol_list)
+                if args.warmup:
+                    drive(base_url, paths, args.concurrency, args.warmup)
+                summary = summarize(*drive(base_url, paths, args.concurrency, args.duration))
+                results['scenarios'][name] = summary
+                print(f"{name:<16} {summary['requests']:>9} {summary['rps']:>9} {summary.get('p50_ms', '-'):>9} "
+                      f"{summary.get('p95_ms', '-'):>9} {summary.get('p99_ms', '-'):>9} "
+                      f"{summary['errors']:>7} {summary['mock_responses']:>6}")
+            results['upstreams'] = {
+                'tickertick_standin': tickertick.model.stats(),
+                'health': requests.get(f"{base_url}/api/health", timeout=10).json(),
+            }
+        finally:
+            process.terminate()
+            process.wait(timeout=10)
+            tickertick.stop()
+
+    output = args.output or os.path.join(RESULTS_DIR, f"load_test-{started.strftime('%Y%m%d-%H%M%S')}.json")
+    os.makedirs(os.path.dirname(os.path.abspath(output)), exist_ok=True)
+    with open(output, 'w') as f:
+        json.dump(results, f, indent=2)
+    print(f"\nResults written to {output}")
+
+    if args.compare:
+        with open(args.compare) as f:
+            worst = compare(results, json.load(f))
+        if args.max_regression is not None and worst > args.max_regression:
+            print(f"Regression of {worst:.1f}% exceeds {args.max_regression}%")
+            sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
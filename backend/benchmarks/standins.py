@@ -0,0 +1,192 @@
+"""
+Local stand-ins for the upstreams app.py talks to, so the API can be
+exercised offline with controllable latency and failure rates:
+
+- TickerTickStandIn: an HTTP server answering TickerTick feed queries with
+  generated stories, paginated with last= like the real feed.
+- FakeYahoo: replacements for yf.download and yf.Ticker serving synthetic
+  bars after a simulated delay.
+
+Latency is drawn from a log-normal distribution around the given median,
+so the tail can be widened with jitter.
+"""
+import json
+import os
+import random
+import re
+import sys
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlsplit
+
+import pandas as pd
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from synthetic import INTRADAY_MINUTES, synthetic_bars  # noqa: E402
+
+# Newest story id of every generated feed, ids count down from here
+NEWEST_STORY_ID = 10 ** 12
+
+
+class UpstreamModel:
+    """Simulated delay and failures of one upstream, with call counters"""
+
+    def __init__(self, latency=0.0, jitter=0.0, failure_rate=0.0, seed=0):
+        self.latency = latency
+        self.jitter = jitter
+        self.failure_rate = failure_rate
+        self._random = random.Random(seed)
+        self._lock = threading.Lock()
+        self.calls = 0
+        self.failures = 0
+
+    def call(self):
+        """Sleep for one sampled delay, then return False if this call should fail"""
+        with self._lock:
+            delay = self.latency * self._random.lognormvariate(0, self.jitter) if self.latency else 0.0
+            failed = self._random.random() < self.failure_rate
+            self.calls += 1
+            self.failures += failed
+        if delay:
+            time.sleep(delay)
+        return not failed
+
+    def stats(self):
+        with self._lock:
+            return {'calls': self.calls, 'failures': self.failures}
+
+
+class TickerTickStandIn:
+    """
+    HTTP server generating TickerTick feeds: each symbol has stories_per_day
+    stories going back history_days from server start, newest first, served
+    page_size at a time. Failed calls answer 503.
+    """
+
+    def __init__(self, latency=0.0, jitter=0.0, failure_rate=0.0, stories_per_day=8, history_days=365,
+                 page_size=200, seed=0, host='127.0.0.1', port=0):
+        self.model = UpstreamModel(latency, jitter, failure_rate, seed)
+        self.stories_per_day = stories_per_day
+        self.history_days = history_days
+        self.page_size = page_size
+        self.newest_ms = int(time.time() * 1000)
+        self._server = ThreadingHTTPServer((host, port), self._handler())
+        self._server.daemon_threads = True
+        self._thread = None
+
+    @property
+    def feed_url(self):
+        """Feed URL template with a {symbol} placeholder, in the form of app.TICKERTICK_FEED_URL"""
+        host, port = self._server.server_address[:2]
+        return (f"http://{host}:{port}/feed?q=(and tt:{{symbol}} (or s:tickerreport s:seekingalpha))"
+                f"&lang=en&n={self.page_size}")
+
+    def stories(self, symbol, last=None):
+        """One page of stories for symbol, starting below story id last"""
+        spacing_ms = 86400000 / self.stories_per_day
+        total = int(self.history_days * self.stories_per_day)
+        first = 0 if last is None else NEWEST_STORY_ID - int(last) + 1
+        return [{
+            'id': str(NEWEST_STORY_ID - k),
+            'title': f"{symbol} story {NEWEST_STORY_ID - k}",
+            'url': f"https://example.com/{symbol.lower()}/{NEWEST_STORY_ID - k}",
+            'site': 'seekingalpha.com',
+            'time': int(self.newest_ms - k * spacing_ms),
+            'tickers': [symbol.lower()]
+        } for k in range(max(first, 0), min(first + self.page_size, total))]
+
+    def _handler(self):
+        standin = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = 'HTTP/1.1'
+
+            def do_GET(self):
+                query = parse_qs(urlsplit(self.path).query)
+                match = re.search(r'tt:(\S+)', query.get('q', [''])[0])
+                if not standin.model.call():
+                    self._send(503, b'{"error": "stand-in failure"}')
+                elif match is None:
+                    self._send(400, b'{"error": "missing tt: query"}')
+                else:
+                    last = query.get('last', [None])[0]
+                    body = json.dumps({'stories': standin.stories(match.group(1).upper(), last)}).encode('utf-8')
+                    self._send(200, body)
+
+            def _send(self, status, body):
+                self.send_response(status)
+                self.send_header('Content-Type', 'application/json')
+                self.send_header('Content-Length', str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, *args):
+                pass
+
+        return Handler
+
+    def start(self):
+        self._thread = threading.Thread(target=self._server.serve_forever, name='tickertick-standin', daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._server.shutdown()
+        self._server.server_close()
+
+
+class _FakeTicker:
+    def __init__(self, yahoo, symbol):
+        self._yahoo = yahoo
+        self.ticker = symbol.upper()
+
+    def history(self, period='1mo', interval='1d', start=None, end=None, **kwargs):
+        if not self._yahoo.model.call():
+            return pd.DataFrame()
+        return self._yahoo.bars(self.ticker, period, interval, start, end)
+
+
+class FakeYahoo:
+    """
+    Stands in for yf.download and yf.Ticker. Bars come from the synthetic
+    engine in the classic yfinance shape (Open, High, Low, Close, Adj Close,
+    Volume on a Date index); failed calls return an empty frame, as yfinance
+    does when a download fails.
+    """
+
+    def __init__(self, latency=0.0, jitter=0.0, failure_rate=0.0, seed=0):
+        self.model = UpstreamModel(latency, jitter, failure_rate, seed)
+
+    def bars(self, symbol, period=None, interval='1d', start=None, end=None):
+        if start is not None:
+            end = pd.Timestamp.now() if end is None else pd.Timestamp(end) - pd.Timedelta(days=1)
+            data = synthetic_bars(symbol, 'max', interval, end=end)
+            data = data[data.index >= pd.Timestamp(start)]
+        else:
+            data = synthetic_bars(symbol, period or '1mo', interval)
+        data = data.copy()
+        # Served as real data, not flagged as mock
+        data.attrs.clear()
+        data.insert(4, 'Adj Close', data['Close'])
+        data.index.name = 'Datetime' if interval in INTRADAY_MINUTES else 'Date'
+        return data
+
+    def download(self, tickers, period=None, interval='1d', start=None, end=None, group_by='column', **kwargs):
+        symbols = tickers.split() if isinstance(tickers, str) else list(tickers)
+        if not self.model.call():
+            return pd.DataFrame()
+        if len(symbols) == 1:
+            return self.bars(symbols[0].upper(), period, interval, start, end)
+        frames = {symbol.upper(): self.bars(symbol.upper(), period, interval, start, end) for symbol in symbols}
+        data = pd.concat(frames, axis=1)
+        return data if group_by == 'ticker' else data.swaplevel(axis=1).sort_index(axis=1)
+
+    def Ticker(self, symbol):
+        return _FakeTicker(self, symbol)
+
+    def install(self, module):
+        """Replace download and Ticker on a yfinance module"""
+        module.download = self.download
+        module.Ticker = self.Ticker
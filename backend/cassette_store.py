@@ -0,0 +1,188 @@
+import asyncio
+import glob
+import gzip
+import hashlib
+import json
+import logging
+import os
+import pickle
+import threading
+import time
+from datetime import datetime
+
+import pandas as pd
+
+logger = logging.getLogger(__name__)
+
+CASSETTE_MODES = ('off', 'record', 'replay')
+
+DEFAULT_MODE = os.environ.get('UPSTREAM_CASSETTE_MODE', 'off')
+DEFAULT_DIR = os.environ.get(
+    'UPSTREAM_CASSETTE_DIR',
+    os.path.join(os.path.dirname(os.path.abspath(__file__)), 'data', 'cassettes')
+)
+DEFAULT_LATENCY_SCALE = float(os.environ.get('UPSTREAM_CASSETTE_LATENCY_SCALE', 1.0))
+
+# Arguments that do not change the upstream response
+IGNORED_ARGS = ('progress', 'timeout')
+# Arguments whose values move with the calendar; replay falls back to a cassette recorded with other dates
+DATE_ARGS = ('start', 'end')
+
+
+class CassetteMissError(LookupError):
+    """Raised in replay mode when no cassette was recorded for a call"""
+
+
+class CassetteResponse:
+    """Replayed HTTP response with the attributes callers read from requests and httpx responses"""
+
+    def __init__(self, status_code, headers, text):
+        self.status_code = status_code
+        self.headers = headers
+        self.text = text
+
+    @property
+    def ok(self):
+        return self.status_code < 400
+
+    def json(self):
+        return json.loads(self.text)
+
+
+def _digest(value):
+    return hashlib.blake2b(json.dumps(value, sort_keys=True, default=str).encode('utf-8'), digest_size=8).hexdigest()
+
+
+class CassetteStore:
+    """
+    Record/replay layer for upstream calls. In record mode every call goes
+    to the upstream and its raw result (a DataFrame, or the status, headers
+    and body of an HTTP response) is written with its duration to a gzipped
+    cassette per (upstream, symbol, query); errors are recorded too. In
+    replay mode calls never reach the network: the cassette is played back
+    after its recorded duration times latency_scale, and calls without one
+    raise CassetteMissError.
+    """
+
+    def __init__(self, mode=DEFAULT_MODE, directory=DEFAULT_DIR, latency_scale=DEFAULT_LATENCY_SCALE):
+        if mode not in CASSETTE_MODES:
+            raise ValueError(f"cassette mode must be one of {CASSETTE_MODES}, got {mode!r}")
+        self.mode = mode
+        self.directory = directory
+        self.latency_scale = latency_scale
+        self._lock = threading.Lock()
+        self.recorded = 0
+        self.replayed = 0
+        self.misses = 0
+
+    @property
+    def enabled(self):
+        return self.mode != 'off'
+
+    def _paths(self, upstream, symbol, query):
+        """(exact cassette path, glob of cassettes of the same query shape)"""
+        query = {key: value for key, value in query.items() if key not in IGNORED_ARGS}
+        shape = {key: '*' if key in DATE_ARGS else value for key, value in query.items()}
+        folder = symbol if len(symbol) <= 60 else f"batch-{_digest(symbol)}"
+        base = os.path.join(self.directory, upstream, folder.replace(os.sep, '_'), _digest(shape))
+        return f"{base}-{_digest(query)}.pkl.gz", f"{base}-*.pkl.gz"
+
+    def _record(self, path, upstream, symbol, query, elapsed, result=None, error=None):
+        if isinstance(result, pd.DataFrame) or result is None:
+            kind, payload = 'frame', result
+        else:
+            kind, payload = 'http', {
+                'status_code': result.status_code, 'headers': dict(result.headers), 'text': result.text
+            }
+        cassette = {
+            'upstream': upstream,
+            'symbol': symbol,
+            'query': query,
+            'recorded_at': datetime.now().isoformat(timespec='seconds'),
+            'elapsed': elapsed,
+            'error': error,
+            'kind': kind,
+            'payload': payload,
+        }
+        try:
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            partial = f"{path}.{threading.get_ident()}.tmp"
+            with gzip.open(partial, 'wb') as f:
+                pickle.dump(cassette, f, protocol=pickle.HIGHEST_PROTOCOL)
+            os.replace(partial, path)
+            with self._lock:
+                self.recorded += 1
+        except Exception as e:
+            logger.warning(f"Failed to record {upstream} cassette for {symbol}: {str(e)}")
+
+    def _load(self, upstream, symbol, query):
+        path, pattern = self._paths(upstream, symbol, query)
+        if not os.path.isfile(path):
+            candidates = glob.glob(pattern)
+            if not candidates:
+                with self._lock:
+                    self.misses += 1
+                raise CassetteMissError(f"No {upstream} cassette for {symbol} {query}")
+            path = max(candidates, key=os.path.getmtime)
+        # Cassettes are pickles, only replay ones recorded from your own runs
+        with gzip.open(path, 'rb') as f:
+            cassette = pickle.load(f)
+        with self._lock:
+            self.replayed += 1
+        return cassette
+
+    @staticmethod
+    def _play(cassette):
+        if cassette['error'] is not None:
+            raise RuntimeError(f"Replayed {cassette['upstream']} error: {cassette['error']}")
+        payload = cassette['payload']
+        if cassette['kind'] == 'http':
+            return CassetteResponse(payload['status_code'], payload['headers'], payload['text'])
+        return None if payload is None else payload.copy()
+
+    def call(self, upstream, symbol, query, fn, *args, **kwargs):
+        """fn(*args, **kwargs) through the cassette layer, for the call identified by (upstream, symbol, query)"""
+        if self.mode == 'off':
+            return fn(*args, **kwargs)
+        if self.mode == 'replay':
+            cassette = self._load(upstream, symbol, query)
+            time.sleep(cassette['elapsed'] * self.latency_scale)
+            return self._play(cassette)
+        path = self._paths(upstream, symbol, query)[0]
+        started = time.perf_counter()
+        try:
+            result = fn(*args, **kwargs)
+        except Exception as e:
+            self._record(path, upstream, symbol, query, time.perf_counter() - started, error=f"{type(e).__name__}: {e}")
+            raise
+        self._record(path, upstream, symbol, query, time.perf_counter() - started, result=result)
+        return result
+
+    async def call_async(self, upstream, symbol, query, fn, *args, **kwargs):
+        """Async counterpart of call for a coroutine function fn"""
+        if self.mode == 'off':
+            return await fn(*args, **kwargs)
+        if self.mode == 'replay':
+            cassette = self._load(upstream, symbol, query)
+            await asyncio.sleep(cassette['elapsed'] * self.latency_scale)
+            return self._play(cassette)
+        path = self._paths(upstream, symbol, query)[0]
+        started = time.perf_counter()
+        try:
+            result = await fn(*args, **kwargs)
+        except Exception as e:
+            self._record(path, upstream, symbol, query, time.perf_counter() - started, error=f"{type(e).__name__}: {e}")
+            raise
+        self._record(path, upstream, symbol, query, time.perf_counter() - started, result=result)
+        return result
+
+    def stats(self):
+        with self._lock:
+            return {
+                'mode': self.mode,
+                'directory': self.directory if self.enabled else None,
+                'latency_scale': self.latency_scale,
+                'recorded': self.recorded,
+                'replayed': self.replayed,
+                'misses': self.misses
+            }
@@ -0,0 +1,141 @@
+import logging
+import os
+import threading
+import time
+from collections import deque
+
+logger = logging.getLogger(__name__)
+
+CLOSED = 'closed'
+OPEN = 'open'
+HALF_OPEN = 'half_open'
+
+DEFAULT_FAILURE_RATE = float(os.environ.get('BREAKER_FAILURE_RATE', 0.5))
+DEFAULT_MIN_CALLS = int(os.environ.get('BREAKER_MIN_CALLS', 5))
+DEFAULT_WINDOW = int(os.environ.get('BREAKER_WINDOW', 20))
+DEFAULT_OPEN_SECONDS = float(os.environ.get('BREAKER_OPEN_SECONDS', 30))
+DEFAULT_SLOW_CALL_SECONDS = float(os.environ.get('BREAKER_SLOW_CALL_SECONDS', 10))
+
+
+class CircuitOpenError(Exception):
+    """Raised instead of calling an upstream whose circuit is open"""
+
+
+class CircuitBreaker:
+    """
+    Per-upstream circuit breaker over a sliding window of recent calls.
+    Errors, results rejected by is_failure (called with the result and the
+    call's arguments) and calls slower than slow_call_seconds all count as
+    failures. Once the failure rate reaches
+    failure_rate the circuit opens and calls fail fast for open_seconds, then
+    a single half-open probe decides whether it closes again.
+    """
+
+    def __init__(self, name, failure_rate=DEFAULT_FAILURE_RATE, min_calls=DEFAULT_MIN_CALLS,
+                 window=DEFAULT_WINDOW, open_seconds=DEFAULT_OPEN_SECONDS,
+                 slow_call_seconds=DEFAULT_SLOW_CALL_SECONDS, is_failure=None):
+        self.name = name
+        self.failure_rate = failure_rate
+        self.min_calls = min_calls
+        self.open_seconds = open_seconds
+        self.slow_call_seconds = slow_call_seconds
+        self.is_failure = is_failure
+        self._calls = deque(maxlen=window)
+        self._lock = threading.Lock()
+        self._state = CLOSED
+        self._opened_at = 0.0
+        self._probe_in_flight = False
+        self.rejected = 0
+
+    def _allow(self):
+        with self._lock:
+            if self._state == OPEN:
+                if time.monotonic() - self._opened_at < self.open_seconds:
+                    self.rejected += 1
+                    return False
+                self._state = HALF_OPEN
+                self._probe_in_flight = False
+                logger.info(f"Circuit {self.name} half-open, probing upstream")
+            if self._state == HALF_OPEN:
+                if self._probe_in_flight:
+                    self.rejected += 1
+                    return False
+                self._probe_in_flight = True
+            return True
+
+    def _record(self, ok, latency):
+        with self._lock:
+            if latency > self.slow_call_seconds:
+                ok = False
+            if self._state == HALF_OPEN:
+                self._probe_in_flight = False
+                if ok:
+                    self._state = CLOSED
+                    self._calls.clear()
+                    logger.info(f"Circuit {self.name} closed")
+                else:
+                    self._trip()
+                self._calls.append((ok, latency))
+                return
+            self._calls.append((ok, latency))
+            if self._state == CLOSED and len(self._calls) >= self.min_calls:
+                failures = sum(1 for call_ok, _ in self._calls if not call_ok)
+                if failures / len(self._calls) >= self.failure_rate:
+                    self._trip()
+
+    def _trip(self):
+        self._state = OPEN
+        self._opened_at = time.monotonic()
+        logger.warning(f"Circuit {self.name} opened for {self.open_seconds}s")
+
+    def call(self, fn, *args, **kwargs):
+        """Call fn through the breaker, raising CircuitOpenError while the circuit is open"""
+        if not self._allow():
+            raise CircuitOpenError(f"{self.name} circuit is open")
+        started = time.monotonic()
+        try:
+            result = fn(*args, **kwargs)
+        except BaseException:
+            self._record(False, time.monotonic() - started)
+            raise
+        ok = not (self.is_failure is not None and self.is_failure(result, *args, **kwargs))
+        self._record(ok, time.monotonic() - started)
+        return result
+
+    async def call_async(self, fn, *args, **kwargs):
+        """Await fn(*args, **kwargs) through the breaker, for the async server's upstream calls"""
+        if not self._allow():
+            raise CircuitOpenError(f"{self.name} circuit is open")
+        started = time.monotonic()
+        try:
+            result = await fn(*args, **kwargs)
+        except BaseException:
+            self._record(False, time.monotonic() - started)
+            raise
+        ok = not (self.is_failure is not None and self.is_failure(result, *args, **kwargs))
+        self._record(ok, time.monotonic() - started)
+        return result
+
+    @property
+    def state(self):
+        with self._lock:
+            if self._state == OPEN and time.monotonic() - self._opened_at >= self.open_seconds:
+                return HALF_OPEN
+            return self._state
+
+    def stats(self):
+        """Return the current state with error rate and latency over the window"""
+        state = self.state
+        with self._lock:
+            calls = list(self._calls)
+            rejected = self.rejected
+        latencies = sorted(latency for _, latency in calls)
+        failures = sum(1 for ok, _ in calls if not ok)
+        return {
+            'state': state,
+            'window_calls': len(calls),
+            'error_rate': round(failures / len(calls), 4) if calls else 0.0,
+            'avg_latency_ms': round(sum(latencies) / len(latencies) * 1000, 1) if latencies else None,
+            'p95_latency_ms': round(latencies[int(0.95 * (len(latencies) - 1))] * 1000, 1) if latencies else None,
+            'rejected': rejected
+        }
@@ -0,0 +1,45 @@
+import os
+from urllib.parse import urlsplit
+
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+DEFAULT_POOL_MAXSIZE = int(os.environ.get('HTTP_POOL_MAXSIZE', 16))
+DEFAULT_RETRIES = int(os.environ.get('HTTP_RETRIES', 2))
+DEFAULT_BACKOFF = float(os.environ.get('HTTP_BACKOFF', 0.3))
+
+# (connect, read) timeouts in seconds for hosts without their own entry
+DEFAULT_TIMEOUT = (5, 30)
+
+
+class PooledHttpClient:
+    """
+    Shared keep-alive HTTP client. One requests.Session holds a bounded
+    urllib3 connection pool per host, so consecutive calls to the same host
+    reuse an open TCP+TLS connection. Idempotent GETs are retried with
+    exponential backoff on connection errors and 429/5xx responses.
+    """
+
+    def __init__(self, timeouts=None, pool_maxsize=DEFAULT_POOL_MAXSIZE,
+                 retries=DEFAULT_RETRIES, backoff=DEFAULT_BACKOFF):
+        self.timeouts = dict(timeouts or {})
+        retry = Retry(
+            total=retries,
+            backoff_factor=backoff,
+            status_forcelist=(429, 500, 502, 503, 504),
+            allowed_methods=frozenset(['GET', 'HEAD']),
+            raise_on_status=False
+        )
+        adapter = HTTPAdapter(pool_connections=4, pool_maxsize=pool_maxsize, max_retries=retry, pool_block=True)
+        self.session = requests.Session()
+        self.session.mount('https://', adapter)
+        self.session.mount('http://', adapter)
+
+    def timeout_for(self, url):
+        return self.timeouts.get(urlsplit(url).hostname, DEFAULT_TIMEOUT)
+
+    def get(self, url, **kwargs):
+        """requests.get through the shared pool, with the host's timeout unless one is given"""
+        kwargs.setdefault('timeout', self.timeout_for(url))
+        return self.session.get(url, **kwargs)
@@ -0,0 +1,39 @@
+from datetime import datetime, time, timedelta
+from zoneinfo import ZoneInfo
+
+# Regular NYSE/NASDAQ session. Exchange holidays are treated as trading days,
+# which only means cached data expires a little earlier than it has to.
+MARKET_TZ = ZoneInfo('America/New_York')
+MARKET_OPEN = time(9, 30)
+MARKET_CLOSE = time(16, 0)
+
+
+def _market_now(now=None):
+    if now is None:
+        return datetime.now(MARKET_TZ)
+    if now.tzinfo is None:
+        return now.replace(tzinfo=MARKET_TZ)
+    return now.astimezone(MARKET_TZ)
+
+
+def is_market_open(now=None):
+    """True during the regular trading session (Mon-Fri, 9:30-16:00 New York time)"""
+    now = _market_now(now)
+    return now.weekday() < 5 and MARKET_OPEN <= now.time() < MARKET_CLOSE
+
+
+def next_market_open(now=None):
+    """Return the start of the next regular trading session after now (timezone-aware)"""
+    now = _market_now(now)
+    candidate = datetime.combine(now.date(), MARKET_OPEN, tzinfo=MARKET_TZ)
+    if candidate <= now:
+        candidate += timedelta(days=1)
+    while candidate.weekday() >= 5:
+        candidate += timedelta(days=1)
+    return candidate
+
+
+def seconds_until_next_open(now=None):
+    """Seconds until the next session opens"""
+    now = _market_now(now)
+    return (next_market_open(now) - now).total_seconds()
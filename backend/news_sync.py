@@ -0,0 +1,118 @@
+import logging
+from datetime import datetime, timedelta
+
+logger = logging.getLogger(__name__)
+
+
+def news_walk_coverage(coverage, reached_stored, oldest, pages, max_pages, cutoff_ms):
+    """
+    Stored coverage after walking new stories: unchanged when the walk reached
+    a stored story, otherwise the walk starts the complete range and reaches
+    down to its oldest story (or to 0 when the feed had no older stories)
+    """
+    if coverage is not None and reached_stored:
+        return coverage
+    if oldest is None or (pages < max_pages and oldest['time'] > cutoff_ms):
+        return (0, None)
+    return (oldest['time'], oldest['id'])
+
+
+class NewsSync:
+    """
+    State of one news store sync for a symbol, independent of how feed pages
+    are fetched, so the Flask and async servers walk TickerTick the same way.
+    New stories are fetched from the newest backwards until a page reaches a
+    story that is already stored. While the stored history does not reach
+    the horizon yet, the rest of the page budget continues backwards from
+    the oldest complete story.
+
+    Drive it by calling start(), then while not done fetching the page below
+    last_id (None for the newest page) and passing its stories to
+    add_page(). Call finish() however the walk ends, so coverage is recorded
+    for what was fetched. start(), add_page(), finish() and load() use the
+    store and block.
+    """
+
+    def __init__(self, store, symbol, max_pages, horizon_days):
+        self.store = store
+        self.symbol = symbol
+        self.max_pages = max_pages
+        self.cutoff_ms = (datetime.now() - timedelta(days=horizon_days)).timestamp() * 1000
+        self.last_id = None
+        self.done = False
+        self._backfilling = False
+        self._coverage = None
+        self._pending = None  # coverage to record however the walk ends
+        self._pages = 0
+        self._reached_stored = False
+        self._oldest = None
+        self._budget = 0
+        self._backfilled = 0
+
+    def start(self):
+        self._coverage = self.store.coverage(self.symbol)
+        if self.max_pages <= 0:
+            self._end_new_walk()
+
+    def add_page(self, stories):
+        """Store one fetched page and move last_id below it, or end the walk"""
+        if self._backfilling:
+            self._add_backfill_page(stories)
+            return
+        if not stories:
+            self._end_new_walk()
+            return
+        self._pages += 1
+        self._reached_stored = bool(self.store.known_ids(self.symbol, [story['id'] for story in stories]))
+        self.store.add(self.symbol, stories)
+        self._oldest = stories[-1]
+        if not self._reached_stored:
+            # Until the walk meets stored stories only its own range is known to be complete
+            self._pending = (self._oldest['time'], self._oldest['id'])
+        if self._reached_stored or self._oldest['time'] <= self.cutoff_ms or self._pages >= self.max_pages:
+            self._end_new_walk()
+        else:
+            self.last_id = self._oldest['id']
+
+    def _end_new_walk(self):
+        self._pending = news_walk_coverage(
+            self._coverage, self._reached_stored, self._oldest, self._pages, self.max_pages, self.cutoff_ms
+        )
+        complete_to, complete_id = self._pending
+        if complete_to > self.cutoff_ms and complete_id is not None and self._pages < self.max_pages:
+            self._backfilling = True
+            self._budget = self.max_pages - self._pages
+            self.last_id = complete_id
+        else:
+            self._end_walk()
+
+    def _add_backfill_page(self, stories):
+        if stories:
+            self._backfilled += 1
+            self.store.add(self.symbol, stories)
+            self._pending = (stories[-1]['time'], stories[-1]['id'])
+            self.last_id = stories[-1]['id']
+            if stories[-1]['time'] > self.cutoff_ms and self._backfilled < self._budget:
+                return
+        complete_to, complete_id = self._pending
+        if self._backfilled < self._budget and complete_to > self.cutoff_ms:
+            self._pending = (0, complete_id)  # the feed has no older stories
+        logger.info(f"Backfilled {self._backfilled} news pages for {self.symbol}")
+        self._end_walk()
+
+    def _end_walk(self):
+        self.done = True
+        logger.info(f"Synced news for {self.symbol} with {self._pages} new-story pages")
+
+    def finish(self):
+        """Record coverage for the pages stored so far"""
+        if self._pending is None:
+            return
+        try:
+            self.store.set_coverage(self.symbol, *self._pending)
+        except Exception as e:
+            logger.warning(f"Failed to record news coverage for {self.symbol}: {str(e)}")
+
+    def load(self):
+        """Stored story dicts for the symbol within the horizon, newest first"""
+        return self.store.load(self.symbol, since_ms=self.cutoff_ms)
@@ -0,0 +1,219 @@
+import logging
+import os
+import threading
+import time
+from collections import deque
+from datetime import datetime
+
+from market_hours import is_market_open, seconds_until_next_open
+from response_cache import MARKET_OPEN_TTL
+
+logger = logging.getLogger(__name__)
+
+PREFETCH_INTERVAL = float(os.environ.get('PREFETCH_INTERVAL', 45))
+# While the market is closed cached responses stay valid until the next open,
+# so the watchlist is only re-warmed this often (for late news)
+PREFETCH_CLOSED_INTERVAL = float(os.environ.get('PREFETCH_CLOSED_INTERVAL', 3600))
+
+# Upstream requests per minute the scheduler may spend on each upstream.
+# TickerTick allows about 10 requests per minute per IP, so prefetch keeps
+# part of that and leaves the rest to user requests.
+PREFETCH_RATE_LIMITS = {
+    'yahoo_finance': float(os.environ.get('PREFETCH_YAHOO_PER_MINUTE', 60)),
+    'tickertick': float(os.environ.get('PREFETCH_TICKERTICK_PER_MINUTE', 6)),
+}
+
+RATE_WINDOW_SECONDS = 60.0
+
+
+class RequestBudget:
+    """Sliding one-minute window of the requests spent on one upstream"""
+
+    def __init__(self, per_minute):
+        self.per_minute = per_minute
+        self._spent = deque()  # [monotonic time, requests]
+
+    def delay(self, requests, now):
+        """Seconds until requests more fit in the window; a request larger than the budget waits for an empty window"""
+        while self._spent and now - self._spent[0][0] >= RATE_WINDOW_SECONDS:
+            self._spent.popleft()
+        excess = sum(spent for _, spent in self._spent) + requests - self.per_minute
+        if excess <= 0 or not self._spent:
+            return 0.0
+        freed = 0
+        for at, spent in self._spent:
+            freed += spent
+            if freed >= excess:
+                return at + RATE_WINDOW_SECONDS - now
+        return self._spent[-1][0] + RATE_WINDOW_SECONDS - now
+
+    def spend(self, requests, now):
+        """Spend requests at now; returns the entry so settle() can move it to when they were sent"""
+        entry = [now, requests]
+        self._spent.append(entry)
+        return entry
+
+    @staticmethod
+    def settle(entry, now):
+        """Date a spend from when its requests finished, since they may be sent any time until then"""
+        entry[0] = now
+
+    def used(self, now):
+        return sum(spent for at, spent in self._spent if now - at < RATE_WINDOW_SECONDS)
+
+
+class PrefetchScheduler:
+    """
+    Background threads that keep a watchlist warm. Each refresher is an
+    (upstream, requests, refresh) triple: refresh(symbol) re-caches the
+    responses built from that upstream and sends it at most requests
+    requests. Every upstream gets its own thread, which refreshes each
+    watched symbol in turn every interval seconds while the market is open
+    and every closed_interval seconds otherwise. Before each refresh, the
+    thread waits until the upstream's per-minute budget in rate_limits can
+    cover its worst case, so a cycle stretches rather than exceeding the
+    limit; entry_ttl() keeps the re-cached responses until the symbol's next
+    refresh when that stretches a pass past interval. Tracks when each symbol
+    was last refreshed and whether it succeeded.
+    """
+
+    def __init__(self, refreshers, symbols, interval=PREFETCH_INTERVAL, closed_interval=PREFETCH_CLOSED_INTERVAL,
+                 rate_limits=PREFETCH_RATE_LIMITS):
+        self.refreshers = list(refreshers)
+        self.symbols = list(symbols)
+        self.interval = interval
+        self.closed_interval = closed_interval
+        self._budgets = {upstream: RequestBudget(rate_limits[upstream]) for upstream, _, _ in self.refreshers}
+        self._cycle_seconds = {}
+        self._status = {}
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._threads = []
+
+    def budgeted_cycle_seconds(self, upstream):
+        """Seconds a pass over the watchlist takes at the upstream's steady budget"""
+        requests = next(requests for name, requests, _ in self.refreshers if name == upstream)
+        return len(self.symbols) * requests * RATE_WINDOW_SECONDS / self._budgets[upstream].per_minute
+
+    def entry_ttl(self, upstream, ttl):
+        """
+        Seconds a response refreshed from upstream should stay cached: ttl,
+        plus however far a pass over the watchlist (budgeted or last measured)
+        runs past interval, so the entry lasts until its symbol is refreshed again
+        """
+        with self._lock:
+            measured = self._cycle_seconds.get(upstream, 0.0)
+        overrun = max(self.budgeted_cycle_seconds(upstream), measured) - self.interval
+        return ttl + max(0.0, overrun)
+
+    def start(self):
+        if any(thread.is_alive() for thread in self._threads):
+            return
+        for upstream, requests, _ in self.refreshers:
+            cycle = self.budgeted_cycle_seconds(upstream)
+            if cycle > MARKET_OPEN_TTL:
+                logger.warning(
+                    f"Prefetching {len(self.symbols)} symbols needs {requests} {upstream} requests each, so a pass takes "
+                    f"{cycle:.0f}s at {self._budgets[upstream].per_minute:g} requests per minute, longer than the "
+                    f"{MARKET_OPEN_TTL:g}s open-market cache TTL; its entries are kept cached for the whole pass"
+                )
+        self._stop.clear()
+        self._threads = [
+            threading.Thread(target=self._run, args=(refresher,), name=f"prefetch-{refresher[0]}", daemon=True)
+            for refresher in self.refreshers
+        ]
+        for thread in self._threads:
+            thread.start()
+        logger.info(f"Prefetch scheduler started for {len(self.symbols)} symbols")
+
+    def stop(self):
+        self._stop.set()
+        for thread in self._threads:
+            thread.join()
+
+    def _run(self, refresher):
+        while not self._stop.is_set():
+            started = time.monotonic()
+            self.run_cycle(refresher)
+            with self._lock:
+                self._cycle_seconds[refresher[0]] = round(time.monotonic() - started, 1)
+            if is_market_open():
+                # Cycles start every interval seconds, or back to back once the budget stretches
+                # them past it; entry_ttl() covers the overrun so entries outlive the gap
+                wait = self.interval - (time.monotonic() - started)
+            else:
+                # Wake up at the open, when entries cached overnight expire
+                wait = min(self.closed_interval, seconds_until_next_open())
+            self._stop.wait(max(1.0, wait))
+
+    def _wait_for_budget(self, upstream, requests):
+        """Block until requests fit in the upstream's budget and spend them; returns the spend, or None if stopped"""
+        budget = self._budgets[upstream]
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                delay = budget.delay(requests, now)
+                if delay <= 0:
+                    return budget.spend(requests, now)
+            if self._stop.wait(delay):
+                return None
+
+    def run_cycle(self, refresher):
+        """Refresh every watched symbol once with one refresher, within its upstream's budget"""
+        upstream, requests, refresh = refresher
+        for symbol in self.symbols:
+            if self._stop.is_set():
+                return
+            spend = self._wait_for_budget(upstream, requests)
+            if spend is None:
+                return
+            started = time.monotonic()
+            try:
+                refresh(symbol)
+                error = None
+            except Exception as e:
+                logger.warning(f"Prefetch of {upstream} data failed for {symbol}: {str(e)}")
+                error = str(e)
+            with self._lock:
+                RequestBudget.settle(spend, time.monotonic())
+                entry = self._status.setdefault((symbol, upstream), {'last_success': None})
+                entry['last_attempt'] = datetime.now()
+                entry['duration_ms'] = round((time.monotonic() - started) * 1000, 1)
+                entry['error'] = error
+                if error is None:
+                    entry['last_success'] = entry['last_attempt']
+
+    def status(self):
+        """Return how fresh each watched symbol is per upstream, and how much of each budget is in use"""
+        now = datetime.now()
+        with self._lock:
+            symbols = {}
+            for symbol in self.symbols:
+                symbols[symbol] = {}
+                for upstream, _, _ in self.refreshers:
+                    entry = self._status.get((symbol, upstream))
+                    if entry is None:
+                        symbols[symbol][upstream] = {'last_success': None, 'age_seconds': None, 'error': None}
+                        continue
+                    last_success = entry['last_success']
+                    symbols[symbol][upstream] = {
+                        'last_success': last_success.isoformat() if last_success else None,
+                        'age_seconds': round((now - last_success).total_seconds(), 1) if last_success else None,
+                        'duration_ms': entry['duration_ms'],
+                        'error': entry['error']
+                    }
+            monotonic_now = time.monotonic()
+            upstreams = {
+                upstream: {
+                    'per_minute': self._budgets[upstream].per_minute,
+                    'used_last_minute': self._budgets[upstream].used(monotonic_now),
+                    'last_cycle_seconds': self._cycle_seconds.get(upstream)
+                }
+                for upstream, _, _ in self.refreshers
+            }
+        return {
+            'running': any(thread.is_alive() for thread in self._threads),
+            'interval': self.interval,
+            'upstreams': upstreams,
+            'symbols': symbols
+        }
@@ -0,0 +1,239 @@
+import logging
+import os
+import sqlite3
+import threading
+
+import pandas as pd
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_PATH = os.environ.get(
+    'PRICE_STORE_PATH',
+    os.path.join(os.path.dirname(os.path.abspath(__file__)), 'data', 'price_store.sqlite3')
+)
+
+OHLCV_COLUMNS = ['Open', 'High', 'Low', 'Close', 'Volume']
+
+# Relative difference between a stored close and a re-downloaded one that
+# means Yahoo has re-adjusted the history (a split or dividend)
+ADJUSTMENT_TOLERANCE = float(os.environ.get('PRICE_STORE_ADJUSTMENT_TOLERANCE', 0.001))
+
+
+def normalize_ohlcv(data):
+    """
+    Bring a yfinance frame into the shape the store keeps:
+    a naive, day-normalized DatetimeIndex and Open/High/Low/Close/Volume columns
+    """
+    df = data.copy()
+    if isinstance(df.columns, pd.MultiIndex):
+        # yf.download returns (Price, Ticker) columns even for a single symbol
+        df.columns = df.columns.get_level_values(0)
+    df = df[[c for c in OHLCV_COLUMNS if c in df.columns]]
+    index = pd.DatetimeIndex(df.index)
+    if index.tz is not None:
+        index = index.tz_localize(None)
+    df.index = index.normalize()
+    df.index.name = 'Date'
+    df = df[~df.index.duplicated(keep='last')]
+    return df.dropna(subset=['Close'])
+
+
+def split_tickers(data, symbols):
+    """
+    Split a multi-ticker yf.download frame into one OHLCV frame per symbol.
+    Symbols without any bars are left out.
+    """
+    frames = {}
+    if data is None or data.empty:
+        return frames
+    if not isinstance(data.columns, pd.MultiIndex):
+        if len(symbols) == 1:
+            frames[symbols[0]] = data.dropna(how='all')
+        return frames
+    # group_by='ticker' puts tickers on level 0, the default group_by='column' on level 1
+    level = 0 if set(symbols) & set(data.columns.get_level_values(0)) else 1
+    tickers = set(data.columns.get_level_values(level))
+    for symbol in symbols:
+        if symbol in tickers:
+            frame = data.xs(symbol, axis=1, level=level).dropna(how='all')
+            if not frame.empty:
+                frames[symbol] = frame
+    return frames
+
+
+class PriceStore:
+    """
+    Local SQLite store of daily OHLCV bars, one row per (symbol, date).
+    The coverage table remembers how far back each symbol has been fully
+    downloaded so a warm symbol only needs the bars after its last stored date.
+    """
+
+    def __init__(self, path=DEFAULT_PATH):
+        self.path = path
+        self._init_lock = threading.Lock()
+        self._initialized = False
+
+    def _connect(self):
+        if not self._initialized:
+            with self._init_lock:
+                if not self._initialized:
+                    directory = os.path.dirname(self.path)
+                    if directory:
+                        os.makedirs(directory, exist_ok=True)
+                    conn = sqlite3.connect(self.path, timeout=30)
+                    try:
+                        conn.execute('PRAGMA journal_mode=WAL')
+                        conn.execute(
+                            'CREATE TABLE IF NOT EXISTS bars ('
+                            'symbol TEXT NOT NULL, date TEXT NOT NULL, '
+                            'open REAL, high REAL, low REAL, close REAL, volume INTEGER, '
+                            'PRIMARY KEY (symbol, date))'
+                        )
+                        conn.execute(
+                            'CREATE TABLE IF NOT EXISTS coverage ('
+                            'symbol TEXT PRIMARY KEY, start TEXT)'
+                        )
+                        conn.commit()
+                    finally:
+                        conn.close()
+                    self._initialized = True
+        return sqlite3.connect(self.path, timeout=30)
+
+    def covers(self, symbol, start):
+        """
+        True if bars for symbol have been fully downloaded from start (None means 'max')
+        """
+        conn = self._connect()
+        try:
+            row = conn.execute('SELECT start FROM coverage WHERE symbol = ?', (symbol,)).fetchone()
+        finally:
+            conn.close()
+        if row is None:
+            return False
+        if row[0] is None:
+            return True
+        return start is not None and row[0] <= start.strftime('%Y-%m-%d')
+
+    def last_date(self, symbol):
+        """Return the most recent stored bar date for symbol, or None"""
+        conn = self._connect()
+        try:
+            row = conn.execute('SELECT MAX(date) FROM bars WHERE symbol = ?', (symbol,)).fetchone()
+        finally:
+            conn.close()
+        return pd.Timestamp(row[0]) if row and row[0] else None
+
+    def delta_start(self, symbol):
+        """
+        Return the date a delta download for symbol should start from, or None.
+        This is the second most recent stored bar: the most recent one may be
+        a partial trading day, so the bar before it is the complete one that
+        append_delta compares against the download.
+        """
+        conn = self._connect()
+        try:
+            rows = conn.execute(
+                'SELECT date FROM bars WHERE symbol = ? ORDER BY date DESC LIMIT 2', (symbol,)
+            ).fetchall()
+        finally:
+            conn.close()
+        return pd.Timestamp(rows[-1][0]) if rows else None
+
+    def load(self, symbol, start=None):
+        """
+        Return stored bars for symbol from start onwards as a yfinance-shaped DataFrame
+        """
+        query = 'SELECT date, open, high, low, close, volume FROM bars WHERE symbol = ?'
+        params = [symbol]
+        if start is not None:
+            query += ' AND date >= ?'
+            params.append(start.strftime('%Y-%m-%d'))
+        query += ' ORDER BY date'
+        conn = self._connect()
+        try:
+            df = pd.read_sql_query(query, conn, params=params)
+        finally:
+            conn.close()
+        df['date'] = pd.to_datetime(df['date'])
+        df = df.set_index('date')
+        df.index.name = 'Date'
+        df.columns = OHLCV_COLUMNS
+        return df
+
+    def append(self, symbol, data, coverage_start=False):
+        """
+        Upsert bars for symbol. Pass coverage_start (a Timestamp, or None for 'max')
+        when data is a complete download from that date up to today.
+        Returns the number of bars written.
+        """
+        df = normalize_ohlcv(data)
+        rows = [
+            (symbol, date.strftime('%Y-%m-%d'), float(o), float(h), float(l), float(c), int(v))
+            for date, o, h, l, c, v in zip(
+                df.index, df['Open'], df['High'], df['Low'], df['Close'], df['Volume'].fillna(0)
+            )
+        ]
+        conn = self._connect()
+        try:
+            with conn:
+                conn.executemany(
+                    'INSERT OR REPLACE INTO bars (symbol, date, open, high, low, close, volume) '
+                    'VALUES (?, ?, ?, ?, ?, ?, ?)',
+                    rows
+                )
+                if coverage_start is not False:
+                    start = None if coverage_start is None else coverage_start.strftime('%Y-%m-%d')
+                    row = conn.execute('SELECT start FROM coverage WHERE symbol = ?', (symbol,)).fetchone()
+                    if row is not None and (row[0] is None or (start is not None and row[0] <= start)):
+                        start = row[0]
+                    conn.execute(
+                        'INSERT OR REPLACE INTO coverage (symbol, start) VALUES (?, ?)',
+                        (symbol, start)
+                    )
+        finally:
+            conn.close()
+        logger.info(f"Stored {len(rows)} bars for {symbol}")
+        return len(rows)
+
+    def append_delta(self, symbol, data, tolerance=ADJUSTMENT_TOLERANCE):
+        """
+        Upsert a delta download starting at delta_start(symbol). Yahoo serves
+        split- and dividend-adjusted history, so when the close of an
+        overlapping complete bar differs from the stored one by more than
+        tolerance, every stored bar is on the old scale: the symbol is
+        invalidated instead and False is returned so the caller downloads it
+        in full. Returns True once the delta is stored.
+        """
+        df = normalize_ohlcv(data)
+        if df.empty:
+            return True
+        conn = self._connect()
+        try:
+            rows = conn.execute(
+                'SELECT date, close FROM bars WHERE symbol = ? AND date >= ? '
+                'AND date < (SELECT MAX(date) FROM bars WHERE symbol = ?)',
+                (symbol, df.index[0].strftime('%Y-%m-%d'), symbol)
+            ).fetchall()
+        finally:
+            conn.close()
+        if rows:
+            stored = pd.Series([close for _, close in rows], index=pd.to_datetime([date for date, _ in rows]))
+            fresh = df['Close'].reindex(stored.index)
+            drift = ((fresh - stored).abs() / stored.abs()).max()
+            if pd.notna(drift) and drift > tolerance:
+                logger.warning(f"Stored bars for {symbol} are off by {drift:.2%} from Yahoo's adjusted history")
+                self.invalidate(symbol)
+                return False
+        self.append(symbol, df)
+        return True
+
+    def invalidate(self, symbol):
+        """Drop every stored bar and the coverage of symbol"""
+        conn = self._connect()
+        try:
+            with conn:
+                conn.execute('DELETE FROM bars WHERE symbol = ?', (symbol,))
+                conn.execute('DELETE FROM coverage WHERE symbol = ?', (symbol,))
+        finally:
+            conn.close()
+        logger.info(f"Invalidated stored bars for {symbol}")
@@ -0,0 +1,182 @@
+import hashlib
+import math
+import os
+
+import numpy as np
+import pandas as pd
+
+# Daily paths start here, so every period of a symbol is a slice of the same history
+EPOCH = pd.Timestamp('1990-01-02')
+
+# Regular session in exchange time, 09:30-16:00
+SESSION_OPEN = pd.Timedelta(hours=9, minutes=30)
+SESSION_MINUTES = 390
+
+INTRADAY_MINUTES = {'1m': 1, '2m': 2, '5m': 5, '15m': 15, '30m': 30, '60m': 60, '90m': 90, '1h': 60}
+
+# Longer intervals aggregate the daily bars, labelled by the first day of each bucket
+RESAMPLE_RULES = {'5d': 'W-MON', '1wk': 'W-MON', '1mo': 'MS', '3mo': 'QS'}
+
+SYNTHETIC_INTERVALS = ('1d',) + tuple(INTRADAY_MINUTES) + tuple(RESAMPLE_RULES)
+
+PERIOD_CALENDAR_DAYS = {
+    '1d': 1, '5d': 7, '7d': 7, '2w': 14, '1mo': 30, '3mo': 90, '6mo': 180,
+    '1y': 365, '2y': 730, '5y': 1825, '10y': 3650,
+}
+
+# Intraday noise is drawn in blocks of this many sessions, counted from EPOCH,
+# so the bars of a session do not depend on the requested window
+SESSIONS_PER_BLOCK = 32
+
+# Intraday requests beyond this many bars keep only the most recent sessions
+SYNTHETIC_MAX_BARS = int(os.environ.get('SYNTHETIC_MAX_BARS', 2000000))
+
+OHLC_AGGREGATION = {'Open': 'first', 'High': 'max', 'Low': 'min', 'Close': 'last', 'Volume': 'sum'}
+
+
+def _rng(symbol, seed, *stream):
+    """Generator for one random series of symbol, stable across processes"""
+    digest = hashlib.blake2b(symbol.upper().encode('utf-8'), digest_size=8).digest()
+    return np.random.default_rng([int.from_bytes(digest, 'little'), seed, *stream])
+
+
+def _symbol_params(symbol, seed):
+    """Starting price, daily drift and volatility, and typical daily volume of a symbol"""
+    rng = _rng(symbol, seed, 0)
+    return {
+        'start_price': rng.uniform(20, 300),
+        'mu': rng.uniform(-0.02, 0.08) / 252,
+        'sigma': rng.uniform(0.15, 0.55) / math.sqrt(252),
+        'volume': math.exp(rng.normal(15, 0.8)),
+    }
+
+
+def business_days(start, end):
+    """Weekdays from start through end, as a DatetimeIndex"""
+    days = np.arange(np.datetime64(start.date()), np.datetime64(end.date()) + 1, dtype='datetime64[D]')
+    return pd.DatetimeIndex(days[np.is_busday(days)].astype('datetime64[ns]'))
+
+
+def window_start(period, end):
+    """First calendar day covered by period when it ends at end"""
+    if period == 'max':
+        return EPOCH
+    if period == 'ytd':
+        return pd.Timestamp(year=end.year, month=1, day=1)
+    return (end - pd.Timedelta(days=PERIOD_CALENDAR_DAYS.get(period, 30))).normalize()
+
+
+def daily_bars(symbol, end, seed=0):
+    """
+    Daily OHLCV bars for every business day from EPOCH through end: a
+    geometric random walk of closes, opens gapping from the previous close,
+    and wicks extending past both, so low <= open, close <= high always holds.
+    Each series draws from its own generator, so the bars for a given day
+    do not depend on end.
+    """
+    params = _symbol_params(symbol, seed)
+    days = business_days(EPOCH, pd.Timestamp(end))
+    n = len(days)
+    sigma = params['sigma']
+
+    shocks = _rng(symbol, seed, 1).standard_normal(n)
+    log_close = math.log(params['start_price']) + np.cumsum(params['mu'] - sigma ** 2 / 2 + sigma * shocks)
+    close = np.exp(log_close)
+    previous_close = np.r_[params['start_price'], close[:-1]]
+    open_ = previous_close * np.exp(0.25 * sigma * _rng(symbol, seed, 2).standard_normal(n))
+    high = np.maximum(open_, close) * np.exp(0.5 * sigma * np.abs(_rng(symbol, seed, 3).standard_normal(n)))
+    low = np.minimum(open_, close) * np.exp(-0.5 * sigma * np.abs(_rng(symbol, seed, 4).standard_normal(n)))
+    # Busier days on bigger moves
+    volume = params['volume'] * np.exp(0.25 * _rng(symbol, seed, 5).standard_normal(n)) * (1 + np.abs(shocks))
+
+    # Rounding to cents is monotonic, so the OHLC ordering survives it
+    return pd.DataFrame({
+        'Open': np.round(open_, 2),
+        'High': np.round(high, 2),
+        'Low': np.round(low, 2),
+        'Close': np.round(close, 2),
+        'Volume': volume.astype(np.int64),
+    }, index=days)
+
+
+def _session_noise(symbol, seed, minutes, sessions, steps):
+    """
+    Noise of each session (business days since EPOCH) as (walk, high wick,
+    low wick, volume) arrays of shape (sessions, steps). Every block of
+    SESSIONS_PER_BLOCK sessions has its own generator, so a session gets the
+    same noise whichever window it is part of.
+    """
+    first_block = sessions[0] // SESSIONS_PER_BLOCK
+    blocks = []
+    for block in range(first_block, sessions[-1] // SESSIONS_PER_BLOCK + 1):
+        rng = _rng(symbol, seed, 6, minutes, block)
+        shape = (SESSIONS_PER_BLOCK, steps)
+        blocks.append(np.stack([
+            rng.standard_normal(shape, dtype=np.float32),
+            rng.standard_exponential(shape, dtype=np.float32),
+            rng.standard_exponential(shape, dtype=np.float32),
+            rng.standard_normal(shape, dtype=np.float32),
+        ]))
+    return np.concatenate(blocks, axis=1)[:, sessions - first_block * SESSIONS_PER_BLOCK]
+
+
+def intraday_bars(symbol, daily, minutes, seed=0):
+    """
+    Intraday bars of the given width for each session in daily. Within a day
+    the log price is a Brownian bridge from the daily open to the daily
+    close, and volume follows the usual U shape over the session.
+    """
+    steps = math.ceil(SESSION_MINUTES / minutes)
+    if len(daily) * steps > SYNTHETIC_MAX_BARS:
+        daily = daily.iloc[-max(1, SYNTHETIC_MAX_BARS // steps):]
+    params = _symbol_params(symbol, seed)
+    step_sigma = params['sigma'] / math.sqrt(steps)
+    sessions = np.busday_count(EPOCH.date(), daily.index.values.astype('datetime64[D]'))
+    shocks, high_wicks, low_wicks, volume_noise = _session_noise(symbol, seed, minutes, sessions, steps)
+
+    day_open = daily['Open'].to_numpy()
+    day_close = daily['Close'].to_numpy()
+    walk = np.cumsum(step_sigma * shocks, axis=1, dtype=np.float64)
+    fraction = np.arange(1, steps + 1) / steps
+    target = np.log(day_close / day_open)[:, None]
+    close = day_open[:, None] * np.exp(walk - fraction * (walk[:, -1:] - target))
+    open_ = np.concatenate([day_open[:, None], close[:, :-1]], axis=1)
+    high = np.maximum(open_, close) * np.exp(0.5 * step_sigma * high_wicks)
+    low = np.minimum(open_, close) * np.exp(-0.5 * step_sigma * low_wicks)
+
+    position = (np.arange(steps) + 0.5) / steps
+    u_shape = 1 + 3 * (2 * position - 1) ** 2
+    weights = u_shape / u_shape.sum()
+    volume = daily['Volume'].to_numpy()[:, None] * weights * np.exp(0.3 * volume_noise)
+
+    offsets = SESSION_OPEN + pd.to_timedelta(np.arange(steps) * minutes, unit='m')
+    index = pd.DatetimeIndex((daily.index.values[:, None] + offsets.values[None, :]).ravel())
+    return pd.DataFrame({
+        'Open': np.round(open_, 2).ravel(),
+        'High': np.round(high, 2).ravel(),
+        'Low': np.round(low, 2).ravel(),
+        'Close': np.round(close, 2).ravel(),
+        'Volume': volume.astype(np.int64).ravel(),
+    }, index=index)
+
+
+def synthetic_bars(symbol, period='6mo', interval='1d', seed=0, end=None):
+    """
+    Deterministic yfinance-shaped OHLCV bars for symbol over period at
+    interval, the same for every call with the same (symbol, seed, end).
+    Unknown intervals fall back to daily bars. The frame is flagged with
+    attrs['mock'] so it is never cached as real data.
+    """
+    end = pd.Timestamp.now() if end is None else pd.Timestamp(end)
+    start = window_start(period, end)
+    daily = daily_bars(symbol, end, seed)
+    # A window with no sessions, such as 1d on a Sunday, still gets the last one
+    daily = daily[daily.index >= min(start, daily.index[-1])]
+    if interval in INTRADAY_MINUTES:
+        data = intraday_bars(symbol, daily, INTRADAY_MINUTES[interval], seed)
+    elif interval in RESAMPLE_RULES:
+        data = daily.resample(RESAMPLE_RULES[interval], label='left', closed='left').agg(OHLC_AGGREGATION).dropna()
+    else:
+        data = daily
+    data.attrs['mock'] = True
+    return data
@@ -0,0 +1,46 @@
+import os
+import sys
+import tempfile
+
+import pandas as pd
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+STORE_DIR = tempfile.mkdtemp()
+os.environ.setdefault('PRICE_STORE_PATH', os.path.join(STORE_DIR, 'price_store.sqlite3'))
+os.environ.setdefault('NEWS_STORE_PATH', os.path.join(STORE_DIR, 'news_store.sqlite3'))
+
+import app as backend
+from circuit_breaker import CircuitBreaker, CLOSED, OPEN
+
+
+@pytest.fixture
+def offline_yahoo(monkeypatch):
+    """yfinance as it behaves without a network: downloads return empty frames, Ticker.history raises"""
+    class Ticker:
+        def __init__(self, symbol):
+            self.symbol = symbol
+
+        def history(self, **kwargs):
+            raise ConnectionError('Failed to resolve query2.finance.yahoo.com')
+
+    monkeypatch.setattr(backend.yf, 'download', lambda tickers, **kwargs: pd.DataFrame())
+    monkeypatch.setattr(backend.yf, 'Ticker', Ticker)
+    monkeypatch.setattr(backend, 'yahoo_breaker', CircuitBreaker('yahoo_finance', is_failure=backend.yahoo_data_missing))
+    backend.response_cache.clear()
+    return backend.app.test_client()
+
+
+def test_empty_frames_for_a_known_symbol_open_the_circuit(offline_yahoo):
+    assert 'AAPL' in backend.symbol_index
+    for _ in range(3):
+        assert offline_yahoo.get('/api/stock-data?symbol=AAPL').status_code == 200
+    health = offline_yahoo.get('/api/health').get_json()
+    assert health['upstreams']['yahoo_finance']['state'] == OPEN
+    assert backend.yahoo_breaker.state == OPEN
+
+
+def test_empty_frames_for_an_unknown_ticker_leave_the_circuit_closed(offline_yahoo):
+    for _ in range(3):
+        offline_yahoo.get('/api/stock-data?symbol=NOSUCHTICKER')
+    assert backend.yahoo_breaker.state == CLOSED
@@ -0,0 +1,80 @@
+import numpy as np
+import pandas as pd
+
+from serialization import price_column
+
+DOWNSAMPLE_METHODS = ('lttb', 'ohlc')
+
+
+def _values(data, name):
+    return price_column(data, name).to_numpy(dtype=np.float64)
+
+
+def lttb_indices(y, n_out):
+    """
+    Largest-Triangle-Three-Buckets: pick n_out indices of series y (sampled at
+    evenly spaced x) that best preserve its visual shape. The first and last
+    points are always kept.
+    """
+    y = np.asarray(y, dtype=np.float64)
+    n = len(y)
+    if n_out >= n or n_out < 3:
+        return np.arange(n)
+
+    x = np.arange(n, dtype=np.float64)
+    # Interior points are split into n_out - 2 buckets
+    edges = np.linspace(1, n - 1, n_out - 1).astype(np.int64)
+    indices = np.empty(n_out, dtype=np.int64)
+    indices[0] = 0
+    indices[-1] = n - 1
+
+    selected = 0
+    for i in range(n_out - 2):
+        start, end = edges[i], edges[i + 1]
+        # Average of the next bucket (the last point for the final bucket)
+        if i + 2 < len(edges):
+            next_start, next_end = edges[i + 1], edges[i + 2]
+            avg_x = x[next_start:next_end].mean()
+            avg_y = y[next_start:next_end].mean()
+        else:
+            avg_x, avg_y = x[-1], y[-1]
+
+        ax, ay = x[selected], y[selected]
+        bucket_x = x[start:end]
+        bucket_y = y[start:end]
+        areas = np.abs((ax - avg_x) * (bucket_y - ay) - (ax - bucket_x) * (avg_y - ay))
+        selected = start + int(np.argmax(areas))
+        indices[i + 1] = selected
+    return indices
+
+
+def ohlc_buckets(data, n_out):
+    """
+    Aggregate a yfinance-shaped frame into n_out consecutive buckets: first
+    open, highest high, lowest low, last close and summed volume, dated by
+    the first bar of each bucket
+    """
+    n = len(data)
+    if n_out >= n:
+        return data
+    starts = np.linspace(0, n, n_out, endpoint=False).astype(np.int64)
+    ends = np.append(starts[1:], n) - 1
+    return pd.DataFrame({
+        'Open': _values(data, 'Open')[starts],
+        'High': np.maximum.reduceat(_values(data, 'High'), starts),
+        'Low': np.minimum.reduceat(_values(data, 'Low'), starts),
+        'Close': _values(data, 'Close')[ends],
+        'Volume': np.add.reduceat(np.nan_to_num(_values(data, 'Volume')), starts),
+    }, index=data.index[starts])
+
+
+def downsample_bars(data, max_points, method='lttb'):
+    """
+    Reduce a yfinance-shaped frame to at most max_points bars, either by
+    keeping the bars LTTB selects on the close price or by OHLC bucket aggregation
+    """
+    if max_points is None or len(data) <= max_points:
+        return data
+    if method == 'ohlc':
+        return ohlc_buckets(data, max_points)
+    return data.iloc[lttb_indices(_values(data, 'Close'), max_points)]
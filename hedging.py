@@ -0,0 +1,58 @@
+import logging
+import time
+from concurrent.futures import FIRST_COMPLETED, wait
+
+logger = logging.getLogger(__name__)
+
+
+def run_hedged(attempts, executor, hedge_delay, deadline, is_good=lambda result: result is not None):
+    """
+    Run attempts, a list of (name, fn) in order of preference, as hedged requests.
+    The next attempt starts when the running ones have not answered within
+    hedge_delay seconds or as soon as one fails. The first result accepted by
+    is_good wins and is returned as (name, result); (None, None) is returned
+    when every attempt failed or the deadline (seconds) ran out.
+
+    Attempts that have not started yet are cancelled. Python threads cannot be
+    interrupted, so attempts already running finish in the background and
+    their results are discarded.
+    """
+    deadline_at = time.monotonic() + deadline
+    queue = list(attempts)
+    pending = {}
+
+    def launch():
+        name, fn = queue.pop(0)
+        pending[executor.submit(fn)] = name
+        return time.monotonic() + hedge_delay
+
+    next_hedge = launch()
+    try:
+        while pending or queue:
+            now = time.monotonic()
+            if now >= deadline_at:
+                logger.warning(f"Deadline of {deadline}s exceeded with {list(pending.values())} still running")
+                return None, None
+            if not pending or (queue and now >= next_hedge):
+                next_hedge = launch()
+                continue
+
+            wake_at = min(deadline_at, next_hedge) if queue else deadline_at
+            done, _ = wait(list(pending), timeout=max(0, wake_at - now), return_when=FIRST_COMPLETED)
+            for future in done:
+                name = pending.pop(future)
+                try:
+                    result = future.result()
+                except Exception as e:
+                    logger.warning(f"{name} failed: {str(e)}")
+                    continue
+                if is_good(result):
+                    return name, result
+                logger.warning(f"{name} returned no data")
+            if done:
+                # A failed attempt frees its slot for the next one straight away
+                next_hedge = time.monotonic()
+        return None, None
+    finally:
+        for future in pending:
+            future.cancel()
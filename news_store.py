@@ -0,0 +1,122 @@
+import json
+import logging
+import os
+import sqlite3
+import threading
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_PATH = os.environ.get(
+    'NEWS_STORE_PATH',
+    os.path.join(os.path.dirname(os.path.abspath(__file__)), 'data', 'news_store.sqlite3')
+)
+
+
+class NewsStore:
+    """
+    Local SQLite store of TickerTick stories keyed by (symbol, story id).
+    For each symbol the coverage table records how far back the stored
+    stories are known to be complete, and the id of the story at that point,
+    so a later walk can resume from there instead of the newest story.
+    """
+
+    def __init__(self, path=DEFAULT_PATH):
+        self.path = path
+        self._init_lock = threading.Lock()
+        self._initialized = False
+
+    def _connect(self):
+        if not self._initialized:
+            with self._init_lock:
+                if not self._initialized:
+                    directory = os.path.dirname(self.path)
+                    if directory:
+                        os.makedirs(directory, exist_ok=True)
+                    conn = sqlite3.connect(self.path, timeout=30)
+                    try:
+                        conn.execute('PRAGMA journal_mode=WAL')
+                        conn.execute(
+                            'CREATE TABLE IF NOT EXISTS stories ('
+                            'symbol TEXT NOT NULL, id TEXT NOT NULL, time INTEGER NOT NULL, story TEXT NOT NULL, '
+                            'PRIMARY KEY (symbol, id))'
+                        )
+                        conn.execute('CREATE INDEX IF NOT EXISTS stories_by_time ON stories (symbol, time)')
+                        conn.execute(
+                            'CREATE TABLE IF NOT EXISTS coverage ('
+                            'symbol TEXT PRIMARY KEY, complete_to INTEGER NOT NULL, complete_id TEXT)'
+                        )
+                        conn.commit()
+                    finally:
+                        conn.close()
+                    self._initialized = True
+        return sqlite3.connect(self.path, timeout=30)
+
+    def known_ids(self, symbol, ids):
+        """Return the subset of story ids already stored for symbol"""
+        ids = [str(story_id) for story_id in ids]
+        if not ids:
+            return set()
+        conn = self._connect()
+        try:
+            rows = conn.execute(
+                f"SELECT id FROM stories WHERE symbol = ? AND id IN ({','.join('?' * len(ids))})",
+                [symbol] + ids
+            ).fetchall()
+        finally:
+            conn.close()
+        return {row[0] for row in rows}
+
+    def add(self, symbol, stories):
+        """Upsert TickerTick story dicts for symbol. Returns the number written."""
+        rows = [(symbol, str(story['id']), int(story['time']), json.dumps(story)) for story in stories]
+        conn = self._connect()
+        try:
+            with conn:
+                conn.executemany(
+                    'INSERT OR REPLACE INTO stories (symbol, id, time, story) VALUES (?, ?, ?, ?)',
+                    rows
+                )
+        finally:
+            conn.close()
+        return len(rows)
+
+    def coverage(self, symbol):
+        """Return (complete_to, complete_id) for symbol, or None if it was never walked"""
+        conn = self._connect()
+        try:
+            row = conn.execute(
+                'SELECT complete_to, complete_id FROM coverage WHERE symbol = ?', (symbol,)
+            ).fetchone()
+        finally:
+            conn.close()
+        return tuple(row) if row else None
+
+    def set_coverage(self, symbol, complete_to, complete_id):
+        """
+        Record that stored stories for symbol are complete back to complete_to
+        (epoch milliseconds, 0 once the feed is exhausted)
+        """
+        conn = self._connect()
+        try:
+            with conn:
+                conn.execute(
+                    'INSERT OR REPLACE INTO coverage (symbol, complete_to, complete_id) VALUES (?, ?, ?)',
+                    (symbol, int(complete_to), None if complete_id is None else str(complete_id))
+                )
+        finally:
+            conn.close()
+
+    def load(self, symbol, since_ms=0, until_ms=None):
+        """Return stored story dicts for symbol with since_ms <= time (< until_ms), newest first"""
+        query = 'SELECT story FROM stories WHERE symbol = ? AND time >= ?'
+        params = [symbol, int(since_ms)]
+        if until_ms is not None:
+            query += ' AND time < ?'
+            params.append(int(until_ms))
+        query += ' ORDER BY time DESC'
+        conn = self._connect()
+        try:
+            rows = conn.execute(query, params).fetchall()
+        finally:
+            conn.close()
+        return [json.loads(row[0]) for row in rows]
@@ -0,0 +1,104 @@
+import logging
+import os
+import threading
+import time
+from collections import OrderedDict
+
+from market_hours import is_market_open, seconds_until_next_open
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_MAX_BYTES = int(os.environ.get('RESPONSE_CACHE_MAX_BYTES', 64 * 1024 * 1024))
+MARKET_OPEN_TTL = float(os.environ.get('CACHE_MARKET_OPEN_TTL', 60))
+
+
+def session_ttl(now=None):
+    """
+    Seconds a response stays fresh: a short TTL while the market is open,
+    otherwise until the next session opens
+    """
+    if is_market_open(now):
+        return MARKET_OPEN_TTL
+    return max(MARKET_OPEN_TTL, seconds_until_next_open(now))
+
+
+class ResponseCache:
+    """
+    Thread-safe in-process LRU cache of serialized responses, bounded by the
+    total size of the stored bytes rather than by entry count
+    """
+
+    def __init__(self, max_bytes=DEFAULT_MAX_BYTES):
+        self.max_bytes = max_bytes
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self._bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def get(self, key):
+        """Return the cached value for key, or None if it is missing or expired"""
+        now = time.monotonic()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+            value, size, expires_at = entry
+            if expires_at <= now:
+                del self._entries[key]
+                self._bytes -= size
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return value
+
+    def contains(self, key):
+        """Return whether a fresh entry exists for key, without counting a lookup"""
+        with self._lock:
+            entry = self._entries.get(key)
+            return entry is not None and entry[2] > time.monotonic()
+
+    def set(self, key, value, ttl=None, size=None):
+        """
+        Store value under key for ttl seconds (defaults to the market-session TTL).
+        size is the byte cost charged against max_bytes, len(value) by default.
+        """
+        if size is None:
+            size = len(value)
+        if size > self.max_bytes:
+            return
+        if ttl is None:
+            ttl = session_ttl()
+        expires_at = time.monotonic() + ttl
+        with self._lock:
+            old = self._entries.pop(key, None)
+            if old is not None:
+                self._bytes -= old[1]
+            self._entries[key] = (value, size, expires_at)
+            self._bytes += size
+            while self._bytes > self.max_bytes:
+                _, (_, evicted_size, _) = self._entries.popitem(last=False)
+                self._bytes -= evicted_size
+                self.evictions += 1
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._bytes = 0
+
+    def stats(self):
+        """Return hit/miss counters and current size"""
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                'hits': self.hits,
+                'misses': self.misses,
+                'hit_ratio': round(self.hits / lookups, 4) if lookups else 0.0,
+                'evictions': self.evictions,
+                'entries': len(self._entries),
+                'bytes': self._bytes,
+                'max_bytes': self.max_bytes
+            }
@@ -0,0 +1,229 @@
+import json
+
+import numpy as np
+import pandas as pd
+
+try:
+    import orjson
+except ImportError:  # optional, the stdlib encoder is used without it
+    orjson = None
+
+try:
+    import msgpack
+except ImportError:  # optional, only needed for format=msgpack
+    msgpack = None
+
+try:
+    import pyarrow
+    import pyarrow.ipc
+except ImportError:  # optional, only needed for format=arrow
+    pyarrow = None
+
+PRICE_KEYS = ('date', 'open', 'high', 'low', 'close', 'volume')
+PRICE_FIELDS = ('open', 'high', 'low', 'close')
+
+# Response formats of /api/stock-data and the optional package each one needs
+PRICE_FORMATS = {
+    'json': None,
+    'columnar': None,
+    'msgpack': 'msgpack',
+    'arrow': 'pyarrow',
+}
+MSGPACK_MIMETYPE = 'application/x-msgpack'
+ARROW_MIMETYPE = 'application/vnd.apache.arrow.stream'
+
+# Delta-encoded prices are sent as integer steps of 1/PRICE_SCALE
+PRICE_SCALE = 100
+
+
+def dumps(payload):
+    """Encode payload as compact JSON bytes, using orjson when it is installed"""
+    if orjson is not None:
+        return orjson.dumps(payload, option=orjson.OPT_SERIALIZE_NUMPY)
+    return json.dumps(payload, separators=(',', ':')).encode('utf-8')
+
+
+def format_dates(values):
+    """Format a DatetimeIndex, datetime column or column of date objects as YYYY-MM-DD strings"""
+    if isinstance(values, pd.Index):
+        values = values.to_series(index=None)
+    return pd.to_datetime(values).dt.strftime('%Y-%m-%d').tolist()
+
+
+def format_bar_times(index):
+    """
+    Format bar timestamps as YYYY-MM-DD, or as exchange-local ISO datetimes
+    (YYYY-MM-DDTHH:MM:SS) when any bar starts after midnight, as intraday bars do
+    """
+    times = pd.DatetimeIndex(index)
+    if (times != times.normalize()).any():
+        return times.strftime('%Y-%m-%dT%H:%M:%S').tolist()
+    return format_dates(index)
+
+
+def is_intraday(dates):
+    """Whether formatted bar dates carry a time of day"""
+    return bool(dates) and len(dates[0]) > 10
+
+
+def price_column(data, name):
+    """Return column name of a yfinance-shaped frame as a Series"""
+    column = data[name]
+    if isinstance(column, pd.DataFrame):
+        # yf.download keys columns by (Price, Ticker) even for a single symbol
+        column = column.iloc[:, 0]
+    return column
+
+
+def _floats(column):
+    return column.to_numpy(dtype=np.float64).tolist()
+
+
+def _ints(column):
+    return np.nan_to_num(column.to_numpy(dtype=np.float64)).astype(np.int64).tolist()
+
+
+def price_columns(data):
+    """
+    Return the bars of a yfinance-shaped DataFrame (DatetimeIndex plus
+    Open/High/Low/Close/Volume columns) as a dict of parallel lists.
+    Dates are formatted once per column and numpy values converted with
+    tolist(), avoiding the per-row Series that DataFrame.iterrows() builds.
+    """
+    return {
+        'date': format_bar_times(data.index),
+        'open': _floats(price_column(data, 'Open')),
+        'high': _floats(price_column(data, 'High')),
+        'low': _floats(price_column(data, 'Low')),
+        'close': _floats(price_column(data, 'Close')),
+        'volume': _ints(price_column(data, 'Volume'))
+    }
+
+
+def columns_to_records(columns):
+    """Turn a dict of parallel price lists (plus any extra per-day columns) into a list of per-day dicts"""
+    keys = list(columns)
+    return [dict(zip(keys, row)) for row in zip(*(columns[key] for key in keys))]
+
+
+def records_to_columns(records):
+    """Turn a list of per-day price dicts into a dict of parallel lists"""
+    return {key: [record[key] for record in records] for key in PRICE_KEYS}
+
+
+def price_records(data):
+    """Return the bars of a yfinance-shaped DataFrame as a list of per-day dicts"""
+    return columns_to_records(price_columns(data))
+
+
+def delta_encode(columns):
+    """
+    Delta-encode parallel price lists: dates become the first date plus the
+    gap to each following bar, in days ('d') or for intraday bars in seconds
+    ('s') as given by date_unit, and prices become integer steps of
+    1/PRICE_SCALE relative to the previous bar (the first value is absolute).
+    Decode with a running sum.
+    """
+    encoded = {'price_scale': PRICE_SCALE}
+    intraday = is_intraday(columns['date'])
+    gaps = pd.to_datetime(pd.Series(columns['date'])).diff()
+    encoded['date_start'] = columns['date'][0] if columns['date'] else None
+    encoded['date_unit'] = 's' if intraday else 'd'
+    encoded['date_delta'] = (gaps.dt.total_seconds() if intraday else gaps.dt.days).fillna(0).astype(np.int64).tolist()
+    for key in PRICE_FIELDS:
+        scaled = np.round(np.asarray(columns[key], dtype=np.float64) * PRICE_SCALE).astype(np.int64)
+        encoded[key] = np.diff(scaled, prepend=0).tolist()
+    encoded['volume'] = columns['volume']
+    return encoded
+
+
+def missing_format_dependency(fmt):
+    """Return the name of the package fmt needs if it is not installed, else None"""
+    package = PRICE_FORMATS.get(fmt)
+    if package == 'msgpack' and msgpack is None:
+        return package
+    if package == 'pyarrow' and pyarrow is None:
+        return package
+    return None
+
+
+def to_msgpack(payload):
+    """Encode payload with msgpack"""
+    return msgpack.packb(payload, use_bin_type=True)
+
+
+def to_arrow(columns, metadata):
+    """
+    Encode parallel price lists as an Arrow IPC stream, with dates as date32
+    or, for intraday bars, second-resolution timestamps. Everything else in
+    the response (stock_info, period, ...) travels as JSON in the schema
+    metadata under the key 'meta'.
+    """
+    dates = pd.to_datetime(pd.Series(columns['date'], dtype=object))
+    if is_intraday(columns['date']):
+        date_column = pyarrow.array(dates, type=pyarrow.timestamp('s'))
+    else:
+        date_column = pyarrow.array(dates.dt.date, type=pyarrow.date32())
+    table = pyarrow.table({
+        'date': date_column,
+        'open': pyarrow.array(columns['open'], type=pyarrow.float64()),
+        'high': pyarrow.array(columns['high'], type=pyarrow.float64()),
+        'low': pyarrow.array(columns['low'], type=pyarrow.float64()),
+        'close': pyarrow.array(columns['close'], type=pyarrow.float64()),
+        'volume': pyarrow.array(columns['volume'], type=pyarrow.int64()),
+    })
+    table = table.replace_schema_metadata({'meta': dumps(metadata)})
+    sink = pyarrow.BufferOutputStream()
+    with pyarrow.ipc.new_stream(sink, table.schema) as writer:
+        writer.write_table(table)
+    return sink.getvalue().to_pybytes()
+
+
+def historic_price_records(df):
+    """Return getHistoricPrice output (date/open/close/volume columns) as integer records"""
+    return [
+        {'date': date, 'open': open_, 'close': close, 'volume': volume}
+        for date, open_, close, volume in zip(
+            format_dates(df['date']), _ints(df['open']), _ints(df['close']), _ints(df['volume'])
+        )
+    ]
+
+
+def join_news_to_bars(columns, news):
+    """
+    Align news records to price bars by date with one searchsorted pass.
+    A story belongs to the first bar on or after its date, so weekend and
+    holiday stories land on the next session and stories newer than the last
+    bar on the last one. Sets 'bar_date' on each record (None for stories
+    older than the first bar) and returns the number of stories per bar.
+    """
+    bar_dates = np.array(columns['date'], dtype='datetime64[D]')
+    if not len(bar_dates):
+        for record in news:
+            record['bar_date'] = None
+        return []
+    story_dates = np.array([record['date'] for record in news], dtype='datetime64[D]')
+    index = np.minimum(np.searchsorted(bar_dates, story_dates, side='left'), len(bar_dates) - 1)
+    inside = story_dates >= bar_dates[0]
+    matched = np.where(inside, np.array(columns['date'], dtype=object)[index], None)
+    for record, bar_date in zip(news, matched.tolist()):
+        record['bar_date'] = bar_date
+    return np.bincount(index[inside], minlength=len(bar_dates)).tolist()
+
+
+def news_records(df):
+    """
+    Return a news DataFrame (pubdate/title/link columns) as a list of dicts,
+    including the TickerTick story id or the per-day stories when the frame has them
+    """
+    records = [
+        {'date': date, 'title': title, 'link': link}
+        for date, title, link in zip(format_dates(df['pubdate']), df['title'].tolist(), df['link'].tolist())
+    ]
+    if 'id' in df.columns:
+        for record, story_id in zip(records, df['id'].astype(str).tolist()):
+            record['id'] = story_id
+    if 'stories' in df.columns:
+        for record, stories in zip(records, df['stories'].tolist()):
+            record['stories'] = stories
+    return records
@@ -37,7 +37,7 @@ cp -r dist/* backend/
 
 # Copy only necessary backend files to root for App Engine
 echo "📋 Preparing App Engine deployment..."
-cp backend/app.py .
+cp backend/*.py .
 cp backend/requirements.txt .
 cp app.yaml .
 
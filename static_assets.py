@@ -0,0 +1,109 @@
+import gzip
+import hashlib
+import logging
+import os
+import re
+
+try:
+    import brotli
+except ImportError:  # optional, only gzip variants are built without it
+    brotli = None
+
+logger = logging.getLogger(__name__)
+
+MIMETYPES = {
+    '.js': 'application/javascript',
+    '.css': 'text/css',
+    '.html': 'text/html',
+    '.png': 'image/png',
+    '.jpg': 'image/jpeg',
+    '.jpeg': 'image/jpeg',
+    '.gif': 'image/gif',
+    '.ico': 'image/x-icon',
+    '.svg': 'image/svg+xml',
+    '.woff': 'font/woff',
+    '.woff2': 'font/woff2',
+    '.ttf': 'font/ttf',
+    '.eot': 'application/vnd.ms-fontobject',
+}
+
+# Types worth compressing; images and woff fonts are already compressed
+COMPRESSIBLE = {'.js', '.css', '.html', '.svg', '.ico', '.ttf', '.eot'}
+
+# Vite bundles carry an 8 character content hash, e.g. main-9gkzSzrv.js.
+# Requiring a digit, capital or underscore keeps names like app-settings.js out.
+HASHED_NAME = re.compile(r'[-.](?=[A-Za-z0-9_]*[A-Z0-9_])[A-Za-z0-9_]{8}\.[a-z0-9]+$')
+
+IMMUTABLE_CACHE_CONTROL = 'public, max-age=31536000, immutable'
+REVALIDATE_CACHE_CONTROL = 'no-cache'
+
+# Files above this size are left to send_from_directory
+MAX_INDEXED_BYTES = 5 * 1024 * 1024
+
+
+class StaticAsset:
+    """One indexed file with its precompressed variants"""
+
+    def __init__(self, path, data):
+        extension = os.path.splitext(path)[1].lower()
+        self.mimetype = MIMETYPES[extension]
+        self.etag = hashlib.blake2b(data, digest_size=16).hexdigest()
+        self.cache_control = IMMUTABLE_CACHE_CONTROL if HASHED_NAME.search(path) else REVALIDATE_CACHE_CONTROL
+        self.variants = {'identity': data}
+        if extension in COMPRESSIBLE:
+            compressed = gzip.compress(data, compresslevel=9, mtime=0)
+            if len(compressed) < len(data):
+                self.variants['gzip'] = compressed
+            if brotli is not None:
+                compressed = brotli.compress(data, quality=11)
+                if len(compressed) < len(data):
+                    self.variants['br'] = compressed
+
+    def negotiate(self, accept_encodings):
+        """
+        Pick the smallest variant the client accepts, given werkzeug's parsed
+        Accept-Encoding header. Returns (encoding, body).
+        """
+        best = 'identity'
+        for encoding in ('br', 'gzip'):
+            if encoding in self.variants and accept_encodings[encoding] > 0:
+                if len(self.variants[encoding]) < len(self.variants[best]):
+                    best = encoding
+        return best, self.variants[best]
+
+
+class StaticAssets:
+    """
+    In-memory index of the frontend files under root, built once at startup:
+    top-level web files such as index.html and styles.css plus everything
+    under the asset directories, keyed by their URL path
+    """
+
+    def __init__(self, root, asset_dirs=('assets',)):
+        self.root = root
+        self.files = {}
+        for name in sorted(os.listdir(root)):
+            self._add(name)
+        for asset_dir in asset_dirs:
+            for dirpath, dirnames, filenames in os.walk(os.path.join(root, asset_dir)):
+                dirnames.sort()
+                for filename in sorted(filenames):
+                    self._add(os.path.relpath(os.path.join(dirpath, filename), root).replace(os.sep, '/'))
+        logger.info(
+            f"Indexed {len(self.files)} static files ({self.total_bytes()} bytes including compressed variants)"
+        )
+
+    def _add(self, path):
+        full_path = os.path.join(self.root, path)
+        if os.path.splitext(path)[1].lower() not in MIMETYPES or not os.path.isfile(full_path):
+            return
+        if os.path.getsize(full_path) > MAX_INDEXED_BYTES:
+            return
+        with open(full_path, 'rb') as f:
+            self.files[path] = StaticAsset(path, f.read())
+
+    def get(self, path):
+        return self.files.get(path)
+
+    def total_bytes(self):
+        return sum(len(body) for asset in self.files.values() for body in asset.variants.values())
@@ -0,0 +1,279 @@
+import bisect
+import csv
+import logging
+import os
+import re
+import sys
+import time
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+# Listing files ship with the app (fetched at image build time), unlike the runtime stores in data/
+LISTING_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'symbols')
+
+# NASDAQ Trader symbol directory, refreshed nightly, covering every US-listed security
+NASDAQ_TRADER_URLS = {
+    'nasdaqlisted.txt': 'https://www.nasdaqtrader.com/dynamic/SymDir/nasdaqlisted.txt',
+    'otherlisted.txt': 'https://www.nasdaqtrader.com/dynamic/SymDir/otherlisted.txt',
+}
+
+# NASDAQ Trader symbol directory files (pipe-delimited) or CSVs with symbol and name columns
+DEFAULT_LISTING_PATHS = os.environ.get(
+    'SYMBOL_LISTING_PATHS',
+    ','.join(os.path.join(LISTING_DIR, name) for name in ('nasdaqlisted.txt', 'otherlisted.txt', 'symbols.csv'))
+)
+
+SYMBOL_COLUMNS = ('symbol', 'act symbol', 'ticker')
+NAME_COLUMNS = ('name', 'security name', 'company name', 'company')
+
+# Name words shorter than this are not fuzzy matched
+FUZZY_MIN_LENGTH = 3
+# Minimum trigram Dice similarity for a fuzzy name word match; one typo in a
+# company name word usually keeps it above this, unrelated words rarely reach it
+FUZZY_MIN_SIMILARITY = 0.4
+
+_WORD = re.compile(r'[a-z0-9]+')
+
+
+def _words(text):
+    return _WORD.findall(text.lower())
+
+
+def _trigrams(word):
+    padded = f' {word} '
+    return {padded[i:i + 3] for i in range(len(padded) - 2)}
+
+
+def load_listings(paths=DEFAULT_LISTING_PATHS):
+    """
+    Read (symbol, name) pairs from the listing files in paths (a comma-separated
+    string or a list) that exist. Test issues and the NASDAQ Trader footer line
+    are skipped; the first file listing a symbol wins.
+    """
+    if isinstance(paths, str):
+        paths = [path.strip() for path in paths.split(',') if path.strip()]
+    records = {}
+    sources = []
+    for path in paths:
+        if not os.path.isfile(path):
+            continue
+        with open(path, newline='', encoding='utf-8', errors='replace') as f:
+            header = f.readline()
+            delimiter = '|' if '|' in header else ','
+            columns = [column.strip().lower() for column in next(csv.reader([header], delimiter=delimiter))]
+            symbol_col = next((columns.index(name) for name in SYMBOL_COLUMNS if name in columns), None)
+            name_col = next((columns.index(name) for name in NAME_COLUMNS if name in columns), None)
+            if symbol_col is None or name_col is None:
+                logger.warning(f"Skipping listing file {path}: no symbol and name columns")
+                continue
+            test_col = columns.index('test issue') if 'test issue' in columns else None
+            for row in csv.reader(f, delimiter=delimiter):
+                if len(row) <= max(symbol_col, name_col) or row[0].startswith('File Creation Time'):
+                    continue
+                if test_col is not None and len(row) > test_col and row[test_col].strip() == 'Y':
+                    continue
+                symbol = row[symbol_col].strip().upper()
+                if symbol and symbol not in records:
+                    records[symbol] = row[name_col].strip()
+        sources.append(path)
+    return list(records.items()), sources
+
+
+def fetch_listings(directory=LISTING_DIR, timeout=30):
+    """
+    Download the NASDAQ Trader symbol directory files into directory.
+    Each file is written to a temporary name and renamed once complete, so a
+    failed download never leaves a truncated listing behind. Returns the paths written.
+    """
+    import requests
+
+    os.makedirs(directory, exist_ok=True)
+    paths = []
+    for name, url in NASDAQ_TRADER_URLS.items():
+        response = requests.get(url, timeout=timeout)
+        response.raise_for_status()
+        path = os.path.join(directory, name)
+        with open(f"{path}.tmp", 'wb') as f:
+            f.write(response.content)
+        os.replace(f"{path}.tmp", path)
+        logger.info(f"Fetched {url} into {path}")
+        paths.append(path)
+    return paths
+
+
+class SymbolIndex:
+    """
+    In-memory search index over (symbol, name) pairs, built once at startup.
+    Symbols are kept sorted so a prefix is one bisect range. Distinct name
+    words are sorted too, each pointing into one flat array of company ids
+    (CSR layout), so a word prefix maps to a single contiguous slice of ids.
+    Misspelled words are matched through a trigram index over the distinct
+    words and ranked by Dice similarity.
+    """
+
+    def __init__(self, records, source=None):
+        started = time.perf_counter()
+        records = sorted({symbol.upper(): name for symbol, name in records}.items())
+        self.source = source
+        self.symbols = [symbol for symbol, _ in records]
+        self.names = [name for _, name in records]
+        self._symbol_lengths = np.array([len(symbol) for symbol in self.symbols], dtype=np.int16)
+
+        # Word -> company ids, flagging whether the word starts the company name
+        postings = {}
+        for company_id, name in enumerate(self.names):
+            for position, word in enumerate(dict.fromkeys(_words(name))):
+                postings.setdefault(word, []).append(company_id * 2 + (position == 0))
+        self.words = sorted(postings)
+        offsets = np.zeros(len(self.words) + 1, dtype=np.int32)
+        offsets[1:] = np.cumsum([len(postings[word]) for word in self.words])
+        flat = np.fromiter(
+            (entry for word in self.words for entry in postings[word]), dtype=np.int32, count=int(offsets[-1])
+        )
+        self._word_offsets = offsets
+        self._word_companies = flat >> 1
+        self._word_is_first = (flat & 1).astype(bool)
+
+        # Trigram -> distinct word ids for fuzzy matching
+        trigram_words = {}
+        for word_id, word in enumerate(self.words):
+            for trigram in _trigrams(word):
+                trigram_words.setdefault(trigram, []).append(word_id)
+        self._trigram_words = {trigram: np.array(ids, dtype=np.int32) for trigram, ids in trigram_words.items()}
+        self._word_trigram_counts = np.array([len(_trigrams(word)) for word in self.words], dtype=np.int16)
+
+        self.build_ms = round((time.perf_counter() - started) * 1000, 1)
+        self._memory_bytes = self._measure_memory()
+        logger.info(f"Indexed {len(self.symbols)} symbols and {len(self.words)} name words in {self.build_ms} ms")
+
+    def __len__(self):
+        return len(self.symbols)
+
+    def __contains__(self, symbol):
+        position = bisect.bisect_left(self.symbols, symbol)
+        return position < len(self.symbols) and self.symbols[position] == symbol
+
+    def _symbol_matches(self, query):
+        """Ids of symbols starting with query, shortest (then alphabetical) first"""
+        lo = bisect.bisect_left(self.symbols, query)
+        hi = bisect.bisect_left(self.symbols, query + '\uffff', lo)
+        order = np.argsort(self._symbol_lengths[lo:hi], kind='stable')
+        return (order + lo).tolist()
+
+    def _word_scores(self, word):
+        """(company ids, scores) of names with a word matching word by prefix, else by trigram similarity"""
+        lo = bisect.bisect_left(self.words, word)
+        hi = bisect.bisect_left(self.words, word + '\uffff', lo)
+        if lo < hi:
+            start, end = self._word_offsets[lo], self._word_offsets[hi]
+            companies = self._word_companies[start:end]
+            # Exact words beat longer ones, and a name's first word beats the rest
+            scores = np.where(self._word_is_first[start:end], 1.0, 0.9)
+            exact_end = self._word_offsets[lo + 1] if self.words[lo] == word else start
+            scores[:exact_end - start] += 0.05
+            return companies, scores
+        if len(word) < FUZZY_MIN_LENGTH:
+            return np.empty(0, dtype=np.int32), np.empty(0)
+
+        word_trigrams = _trigrams(word)
+        trigrams = [self._trigram_words[trigram] for trigram in word_trigrams if trigram in self._trigram_words]
+        if not trigrams:
+            return np.empty(0, dtype=np.int32), np.empty(0)
+        shared = np.bincount(np.concatenate(trigrams), minlength=len(self.words))
+        similarity = 2 * shared / (len(word_trigrams) + self._word_trigram_counts)
+        candidates = np.flatnonzero(similarity >= FUZZY_MIN_SIMILARITY)
+        similarity = similarity[candidates]
+        if not len(candidates):
+            return np.empty(0, dtype=np.int32), np.empty(0)
+        # Gather the company slices of all matched words without a Python loop
+        starts = self._word_offsets[candidates]
+        lengths = self._word_offsets[candidates + 1] - starts
+        shifts = np.repeat(starts - np.cumsum(lengths) + lengths, lengths)
+        companies = self._word_companies[shifts + np.arange(lengths.sum())]
+        return companies, np.repeat(0.8 * similarity, lengths)
+
+    def _name_scores(self, words):
+        """
+        Dense array of name scores per company: the mean word score over the
+        query words, or 0 unless every word matched
+        """
+        total = None
+        for word in words:
+            companies, scores = self._word_scores(word)
+            if not len(companies):
+                return None
+            # A name can match a word more than once, keep its best match
+            best = np.zeros(len(self.symbols))
+            np.maximum.at(best, companies, scores)
+            total = best if total is None else np.where((total > 0) & (best > 0), total + best, 0.0)
+        return total / len(words)
+
+    def search(self, query, limit=10):
+        """
+        Rank symbols for a type-ahead query: an exact symbol first, then symbol
+        prefixes (shortest first), then company names whose words start with
+        every query word, then names matching misspelled words. Ties are
+        broken alphabetically by symbol.
+        """
+        query = query.strip()
+        if not query:
+            return []
+        ranked = {}
+        symbol_query = query.upper()
+        for rank, company_id in enumerate(self._symbol_matches(symbol_query)[:limit]):
+            ranked[company_id] = 3.0 if self.symbols[company_id] == symbol_query else 2.0 - rank * 1e-3
+        words = _words(query)
+        scores = self._name_scores(words) if words else None
+        if scores is not None:
+            matched = np.flatnonzero(scores > 0)
+            if len(matched) > limit:
+                # Company ids follow symbol order, so subtracting a tiny multiple breaks ties alphabetically
+                keys = scores[matched] - matched * 1e-9
+                matched = matched[np.argpartition(-keys, limit)[:limit]]
+            for company_id, score in zip(matched.tolist(), scores[matched].tolist()):
+                if score > ranked.get(company_id, 0.0):
+                    ranked[company_id] = score
+        best = sorted(ranked.items(), key=lambda item: (-item[1], item[0]))[:limit]
+        return [{'symbol': self.symbols[company_id], 'name': self.names[company_id]} for company_id, _ in best]
+
+    def _measure_memory(self):
+        """Approximate bytes held by the index, including the strings it references"""
+        total = sys.getsizeof(self.symbols) + sys.getsizeof(self.names) + sys.getsizeof(self.words)
+        total += sum(sys.getsizeof(text) for text in self.symbols)
+        total += sum(sys.getsizeof(text) for text in self.names)
+        total += sum(sys.getsizeof(text) for text in self.words)
+        total += sys.getsizeof(self._trigram_words)
+        total += sum(sys.getsizeof(trigram) + ids.nbytes for trigram, ids in self._trigram_words.items())
+        for array in (self._symbol_lengths, self._word_offsets, self._word_companies,
+                      self._word_is_first, self._word_trigram_counts):
+            total += array.nbytes
+        return total
+
+    def stats(self):
+        return {
+            'symbols': len(self.symbols),
+            'name_words': len(self.words),
+            'trigrams': len(self._trigram_words),
+            'memory_bytes': self._memory_bytes,
+            'build_ms': self.build_ms,
+            'source': self.source
+        }
+
+
+if __name__ == '__main__':
+    # python symbol_index.py [directory]: fetch the listing files, as the Docker build does
+    logging.basicConfig(level=logging.INFO)
+    # The app falls back to the popular stocks without listings, so an
+    # unreachable NASDAQ Trader must not fail the build
+    import requests
+
+    directory = sys.argv[1] if len(sys.argv) > 1 else LISTING_DIR
+    try:
+        paths = fetch_listings(directory)
+    except (requests.RequestException, OSError) as e:
+        logger.warning(f"Symbol listings unavailable, search will only cover the popular stocks: {str(e)}")
+        sys.exit(0)
+    records, _ = load_listings(paths)
+    logger.info(f"{len(records)} symbols listed")